@@ -1,453 +1,2702 @@
 #!/usr/bin/env python3
 
+import bisect
+import contextlib
+import html
+import json
+import logging
+import mmap
+import os
+import queue
+import re
 import sys
-import tkinter as tk
-from tkinter import ttk, filedialog, messagebox
+import threading
+import time
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from fractions import Fraction
+
+try:
+    import tomllib
+except ImportError:
+    tomllib = None
 
 
 # ------------------------- resolve api connection -------------------------
 
-try:
-    resolve
-except NameError:
-    from python_get_resolve import GetResolve
-    resolve = GetResolve()
+def get_resolve():
+    """Return the Resolve scripting object, connecting on first use"""
+    global resolve
+    with _resolve_lock:
+        try:
+            resolve
+        except NameError:
+            from python_get_resolve import GetResolve
+            resolve = GetResolve()
+    if _profiler is not None:
+        return _profiler.wrap(resolve)
+    return resolve
+
+def get_current_project():
+    return get_resolve().GetProjectManager().GetCurrentProject()
+
+# ------------------------- api profiling -------------------------
+
+class ApiProxy:
+    """
+    Transparent proxy around a Resolve API object
+
+    Method calls are forwarded to the wrapped object and timed by the
+    profiler. API objects returned by a call are wrapped in turn, and proxies
+    passed as arguments (also inside lists and clipInfo dicts) are unwrapped.
+    """
+
+    __slots__ = ("_target", "_profiler")
+
+    def __init__(self, target, profiler):
+        self._target = target
+        self._profiler = profiler
+
+    def __getattr__(self, name):
+        attribute = getattr(self._target, name)
+        if not callable(attribute):
+            return attribute
+        profiler = self._profiler
+
+        def call(*args, **kwargs):
+            args = [unwrap_api_object(arg) for arg in args]
+            kwargs = {key: unwrap_api_object(value) for key, value in kwargs.items()}
+            started = time.perf_counter()
+            try:
+                result = attribute(*args, **kwargs)
+            finally:
+                profiler.record(name, started, time.perf_counter() - started)
+            return profiler.wrap(result)
+
+        return call
+
+    def __repr__(self):
+        return f"ApiProxy({self._target!r})"
+
+def unwrap_api_object(value):
+    if isinstance(value, ApiProxy):
+        return value._target
+    if isinstance(value, list):
+        return [unwrap_api_object(item) for item in value]
+    if isinstance(value, dict):
+        return {key: unwrap_api_object(item) for key, item in value.items()}
+    return value
+
+class ApiProfiler:
+    """
+    Counts and times every API call made through ApiProxy objects
+
+    Calls are attributed to the pipeline phase active on the calling thread
+    (see profile_phase), wall time is also accumulated per phase.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.started = time.perf_counter()
+        self.calls = {}
+        self.phases = {}
+        self.events = []
+
+    @property
+    def current_phase(self):
+        return getattr(self._local, "phase", "other")
+
+    def wrap(self, value):
+        if value is None or isinstance(value, (str, bytes, int, float, bool, ApiProxy)):
+            return value
+        if isinstance(value, list):
+            return [self.wrap(item) for item in value]
+        if isinstance(value, dict):
+            return {key: self.wrap(item) for key, item in value.items()}
+        return ApiProxy(value, self)
+
+    def record(self, method, started, seconds):
+        phase = self.current_phase
+        with self._lock:
+            stats = self.calls.setdefault((phase, method), [0, 0.0])
+            stats[0] += 1
+            stats[1] += seconds
+            self.events.append((phase, method, started - self.started, seconds))
+
+    def enter_phase(self, name):
+        previous = self.current_phase
+        self._local.phase = name
+        return previous, time.perf_counter()
+
+    def exit_phase(self, name, previous, started):
+        self._local.phase = previous
+        with self._lock:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - started
+
+    def summary(self):
+        """Return a text table of wall time, API calls and API time per phase and method"""
+        lines = [f"{'phase':<18} {'method':<24} {'calls':>8} {'api s':>9} {'wall s':>9}"]
+        for phase in sorted(set(self.phases) | {phase for phase, _ in self.calls}):
+            methods = sorted(((method, stats) for (call_phase, method), stats in self.calls.items() if call_phase == phase), key=lambda entry: -entry[1][1])
+            calls = sum(stats[0] for _, stats in methods)
+            api_seconds = sum(stats[1] for _, stats in methods)
+            lines.append(f"{phase:<18} {'(total)':<24} {calls:>8} {api_seconds:>9.3f} {self.phases.get(phase, 0.0):>9.3f}")
+            for method, (count, seconds) in methods:
+                lines.append(f"{'':<18} {method:<24} {count:>8} {seconds:>9.3f}")
+        return "\n".join(lines)
+
+    def write_trace(self, file_path):
+        """Write the per-phase totals, per-method totals and every call event as JSON"""
+        trace = {
+            "phases": self.phases,
+            "calls": [{"phase": phase, "method": method, "count": count, "seconds": seconds} for (phase, method), (count, seconds) in self.calls.items()],
+            "events": [{"phase": phase, "method": method, "t": round(offset, 6), "seconds": round(seconds, 6)} for phase, method, offset, seconds in self.events],
+        }
+        os.makedirs(os.path.dirname(os.path.abspath(file_path)), exist_ok=True)
+        with open(file_path, 'w', encoding='utf-8') as file:
+            json.dump(trace, file, indent=1)
+
+class _ProfilePhase:
+    __slots__ = ("profiler", "name", "previous", "started")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.previous, self.started = self.profiler.enter_phase(self.name)
+        return self
+
+    def __exit__(self, *exc_info):
+        self.profiler.exit_phase(self.name, self.previous, self.started)
+        return False
+
+def profile_phase(name):
+    """Attribute the API calls of a with-block to a pipeline phase (a shared no-op when profiling is off)"""
+    if _profiler is None:
+        return _NO_PROFILE_PHASE
+    return _ProfilePhase(_profiler, name)
+
+def enable_profiling():
+    global _profiler
+    if _profiler is None:
+        _profiler = ApiProfiler()
+    return _profiler
+
+def disable_profiling():
+    global _profiler
+    _profiler = None
+
+def finish_profiling(label="execute"):
+    """Log the profiling summary, write the JSON trace to PROFILE_DIR and start a new profile"""
+    if _profiler is None:
+        return None
+    logger.info("%s", _profiler.summary())
+    trace_path = os.path.join(PROFILE_DIR, f"{label}-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    try:
+        _profiler.write_trace(trace_path)
+        logger.info("Profile trace written to %s", trace_path)
+    except OSError as e:
+        logger.warning("Could not write profile trace: %s", e)
+        trace_path = None
+    _profiler.reset()
+    return trace_path
+
+# ------------------------- logging -------------------------
+
+logger = logging.getLogger("OpenCaptions")
+
+def configure_logging(level=None, log_file=None):
+    """
+    Send OpenCaptions log records to the console and optionally to a log file
+
+    level defaults to $OPENCAPTIONS_LOG_LEVEL (INFO when unset) and log_file to
+    $OPENCAPTIONS_LOG_FILE. Per-cue detail is only logged at DEBUG. The
+    console (stderr, so batch mode keeps stdout for its JSON report) shows
+    the level and message, the log file also the time and thread. Calling it
+    again replaces the previous handlers.
+    """
+    if level is None:
+        level = os.environ.get("OPENCAPTIONS_LOG_LEVEL", "INFO")
+    if isinstance(level, str):
+        level_name = level
+        level = getattr(logging, level_name.upper(), None)
+        if not isinstance(level, int):
+            raise ValueError(f"Unknown log level '{level_name}'")
+    if log_file is None:
+        log_file = os.environ.get("OPENCAPTIONS_LOG_FILE")
+
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+        handler.close()
+
+    console_handler = logging.StreamHandler(sys.stderr)
+    console_handler.setFormatter(logging.Formatter(LOG_CONSOLE_FORMAT))
+    logger.addHandler(console_handler)
+    if log_file:
+        log_file = os.path.expanduser(log_file)
+        if os.path.dirname(log_file):
+            os.makedirs(os.path.dirname(log_file), exist_ok=True)
+        file_handler = logging.FileHandler(log_file, encoding="utf-8")
+        file_handler.setFormatter(logging.Formatter(LOG_FILE_FORMAT))
+        logger.addHandler(file_handler)
+
+    logger.setLevel(level)
+    logger.propagate = False
+    return logger
+
+class ProgressLog:
+    """
+    Rate-limited progress summaries for per-cue loops
+
+    update(done) logs "<label>: done/total (rate)" at INFO only once
+    LOG_PROGRESS_EVERY_CUES cues or LOG_PROGRESS_INTERVAL seconds have passed
+    since the previous summary, so it is cheap to call on every cue.
+    """
+
+    __slots__ = ("label", "total", "every_cues", "every_seconds", "enabled", "started", "_last_done", "_last_time")
+
+    def __init__(self, label, total, every_cues=None, every_seconds=None):
+        self.label = label
+        self.total = total
+        self.every_cues = every_cues or LOG_PROGRESS_EVERY_CUES
+        self.every_seconds = every_seconds or LOG_PROGRESS_INTERVAL
+        self.enabled = logger.isEnabledFor(logging.INFO)
+        self.started = self._last_time = time.monotonic()
+        self._last_done = 0
+
+    def update(self, done):
+        if not self.enabled:
+            return
+        now = time.monotonic()
+        if done - self._last_done < self.every_cues and now - self._last_time < self.every_seconds:
+            return
+        elapsed = now - self.started
+        logger.info("%s: %d/%d (%.0f cues/s)", self.label, done, self.total, done / elapsed if elapsed > 0 else 0.0)
+        self._last_done = done
+        self._last_time = now
+
+# log output, see configure_logging and ProgressLog
+LOG_CONSOLE_FORMAT = "[%(levelname)s] %(message)s"
+LOG_FILE_FORMAT = "%(asctime)s %(levelname)s [%(threadName)s] %(message)s"
+LOG_PROGRESS_EVERY_CUES = 1000
+LOG_PROGRESS_INTERVAL = 5.0
 
-project_manager = resolve.GetProjectManager()
-project = project_manager.GetCurrentProject()
-timeline = project.GetCurrentTimeline()
+# guards the lazy connection in get_resolve, which the UI makes from a worker thread
+_resolve_lock = threading.Lock()
+
+# appended to a job status when Resolve refused part of a rollback, see run_caption_jobs
+ROLLBACK_INCOMPLETE = " (rollback incomplete)"
+
+# number of clips sent to Resolve per AppendToTimeline call
+APPEND_BATCH_SIZE = 500
+
+# worker threads preparing subtitle files while earlier tracks are inserted
+PREPARE_WORKERS = 4
+
+# bytes looked at when detecting the format of a subtitle file
+SUBTITLE_DETECT_BYTES = 4096
+
+# write buffer size used when exporting subtitle files
+SUBTITLE_WRITE_BUFFER_SIZE = 1 << 16
+
+# on-disk cache of template duration multipliers, see get_duration_multiplier
+DURATION_MULTIPLIER_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".opencaptions", "duration_multipliers.json")
+_duration_multipliers = None
+
+# API call profiling, off unless OPENCAPTIONS_PROFILE is set or enable_profiling() is called
+PROFILE_DIR = os.path.join(os.path.expanduser("~"), ".opencaptions", "profiles")
+_profiler = None
+_NO_PROFILE_PHASE = contextlib.nullcontext()
+
+# presets of the text transformation pipeline, see TextTransformPipeline
+DEFAULT_PUNCTUATION = ".,"
+_DEFAULT_PUNCTUATION_TABLE = str.maketrans("", "", DEFAULT_PUNCTUATION)
+CASE_TRANSFORMS = {
+    "Keep Case": None,
+    "Lowercase": str.lower,
+    "Uppercase": str.upper,
+    "Capitalize All Words": str.title,
+}
+TEXT_RULE_KEYS = {"punctuation", "replacements", "profanity", "mask_char", "max_chars_per_line"}
+
+# how overlapping cues are resolved before insertion, see quantize_cues
+OVERLAP_POLICIES = ("trim", "shift", "spill")
+
+# extensions of the subtitle formats read_subtitles understands
+SUBTITLE_EXTENSIONS = (".srt", ".vtt", ".ass", ".ssa", ".json")
+SUBTITLE_FILE_TYPES = [("Subtitle files", " ".join(f"*{extension}" for extension in SUBTITLE_EXTENSIONS)), ("All files", "*.*")]
+
+# Media Pool folder holding the templates offered in the UI
+CAPTIONS_TEMPLATES_FOLDER = "Captions Templates"
+
+# TimelineSnapshot cache, keyed by timeline unique id
+_timeline_snapshots = {}
+
+VTT_INLINE_TIMESTAMP_RE = re.compile(r'<((?:\d+:)?\d{1,2}:\d{1,2}\.\d{1,3})>')
+VTT_TAG_RE = re.compile(r'</?[^>]*>')
+ASS_TIME_RE = re.compile(r'(\d+):(\d{1,2}):(\d{1,2})[.,](\d{1,3})')
+ASS_OVERRIDE_RE = re.compile(r'\{[^}]*\}')
+ASS_OVERRIDE_SPLIT_RE = re.compile(r'\{([^}]*)\}')
+ASS_KARAOKE_RE = re.compile(r'\\[kK][fo]?(\d+)')
+ASS_DEFAULT_EVENT_FORMAT = ["layer", "start", "end", "style", "name", "marginl", "marginr", "marginv", "effect", "text"]
+SRT_TIMING_RE = re.compile(r'(?:(\d+):)?(\d{1,2}):(\d{1,2})[,.](\d{1,3})\s*-->\s*(?:(\d+):)?(\d{1,2}):(\d{1,2})[,.](\d{1,3})')
 
 # ------------------------- srt file functions -------------------------
 
-def srt2df(file_path):
-    df = []
+class CueStore:
+    """
+    Compact columnar store for subtitle cues
 
-    with open(file_path, 'r', encoding='utf-8') as file:
-        content = file.read()
+    Ids and start/end times (in milliseconds) live in parallel arrays and the
+    text in a plain list, so multi-hour files stay small in memory.
+    Word timestamps, when the source has them, are kept sparsely in words:
+    cue index -> list of (start_ms, end_ms, word).
+    Iterating the store yields the legacy row dicts
+    ({'id', 'start', 'end', 'text'} with times in seconds).
+    """
 
-    subtitle_blocks = content.strip().split('\n\n')
+    __slots__ = ("ids", "start_ms", "end_ms", "texts", "words")
 
-    for block in subtitle_blocks:
-        lines = block.split('\n')
-        if len(lines) >= 3:
+    def __init__(self):
+        self.ids = array('q')
+        self.start_ms = array('q')
+        self.end_ms = array('q')
+        self.texts = []
+        self.words = {}
 
-            nid = int(lines[0])
+    @classmethod
+    def from_rows(cls, rows):
+        """Build a store from an iterable of legacy row dicts"""
+        store = cls()
+        for row in rows:
+            store.append(row['id'], round(row['start'] * 1000), round(row['end'] * 1000), row['text'])
+        return store
 
-            timestamp = lines[1]
-            text = '\n'.join(lines[2:])
+    def append(self, nid, start_ms, end_ms, text, words=None):
+        if words:
+            self.words[len(self.texts)] = words
+        self.ids.append(nid)
+        self.start_ms.append(start_ms)
+        self.end_ms.append(end_ms)
+        self.texts.append(text)
 
-            start_time = timestamp.split(' --> ')[0]
-            end_time = timestamp.split(' --> ')[1]
-            
-            h, m, s = start_time.replace(',', '.').split(':')
-            startTime_seconds = float(h) * 3600 + float(m) * 60 + float(s)
+    def row(self, index):
+        return {'id': self.ids[index], 'start': self.start_ms[index] / 1000, 'end': self.end_ms[index] / 1000, 'text': self.texts[index]}
 
-            h, m, s = end_time.replace(',', '.').split(':')
-            endTime_seconds = float(h) * 3600 + float(m) * 60 + float(s)
+    def __len__(self):
+        return len(self.texts)
 
-            df.append({'id': nid, 'start': startTime_seconds, 'end': endTime_seconds, 'text': text})
+    def __iter__(self):
+        for index in range(len(self.texts)):
+            yield self.row(index)
 
-    return df
+    def __repr__(self):
+        return f"CueStore({len(self)} cues)"
 
-def df2srt(df, file_path):
-    with open(file_path, 'w', encoding='utf-8') as file:
-        for row in df:
+def as_cue_store(df):
+    """Return df as a CueStore, converting legacy lists of row dicts"""
+    if isinstance(df, CueStore):
+        return df
+    return CueStore.from_rows(df or [])
+
+def parse_srt_timing(line):
+    """
+    Parse an SRT timing line ("00:00:01,000 --> 00:00:02,500")
+    Returns (start_ms, end_ms), or None if the line is malformed
+    """
+    match = SRT_TIMING_RE.match(line.strip())
+    if not match:
+        return None
+    h1, m1, s1, ms1, h2, m2, s2, ms2 = match.groups()
+    start_ms = ((int(h1 or 0) * 60 + int(m1)) * 60 + int(s1)) * 1000 + int(ms1.ljust(3, '0'))
+    end_ms = ((int(h2 or 0) * 60 + int(m2)) * 60 + int(s2)) * 1000 + int(ms2.ljust(3, '0'))
+    return start_ms, end_ms
+
+def iter_srt_cues(lines):
+    """
+    Incrementally parse SRT cues from an iterable of lines
+
+    Yields (id, start_ms, end_ms, text) tuples. Cues are delimited by their
+    timing line rather than by blank lines, so blank lines inside the text
+    are kept; a blank line followed by a lone number still starts a new
+    block. Blocks with a missing or malformed timing line or no text are
+    dropped, and cues without a numeric id get the previous id + 1.
+    """
+    pending = None
+    text_lines = []
+    last_id = 0
+
+    def finish():
+        # a blank line and a lone number start a block whose timing line is
+        # missing; its text is dropped rather than merged into this cue
+        for index in range(len(text_lines) - 1):
+            if not text_lines[index].strip() and text_lines[index + 1].strip().isdigit():
+                del text_lines[index:]
+                break
+        while text_lines and not text_lines[-1].strip():
+            text_lines.pop()
+        while text_lines and not text_lines[0].strip():
+            text_lines.pop(0)
+        return '\n'.join(text_lines)
+
+    for line in lines:
+        line = line.rstrip('\r\n').lstrip('\ufeff')
+
+        if '-->' not in line:
+            # blank lines are kept even between dropped blocks, the id
+            # check below depends on them
+            text_lines.append(line)
+            continue
+
+        # the line right before a timing line is the cue id when it is a
+        # number standing on its own after a blank line
+        nid = None
+        if text_lines and text_lines[-1].strip().isdigit() and (len(text_lines) == 1 or not text_lines[-2].strip()):
+            nid = int(text_lines.pop().strip())
+
+        if pending is not None:
+            text = finish()
+            if text:
+                yield pending[0], pending[1], pending[2], text
+        text_lines.clear()
+
+        timing = parse_srt_timing(line)
+        if timing is None:
+            pending = None
+            continue
+
+        last_id = nid if nid is not None else last_id + 1
+        pending = (last_id, timing[0], timing[1])
+
+    if pending is not None:
+        text = finish()
+        if text:
+            yield pending[0], pending[1], pending[2], text
+
+def iter_mapped_lines(buffer):
+    """Decode a memory-mapped UTF-8 file line by line, without copying it whole"""
+    buffer.seek(0)
+    for raw_line in iter(buffer.readline, b""):
+        yield raw_line.decode('utf-8', errors='replace')
+
+def read_srt(buffer):
+    """SRT reader for read_subtitles, see iter_srt_cues"""
+    for nid, start_ms, end_ms, text in iter_srt_cues(iter_mapped_lines(buffer)):
+        yield nid, start_ms, end_ms, text, None
+
+def parse_vtt_payload(payload, start_ms, end_ms):
+    """
+    Clean a WebVTT cue payload
+    Returns (text, words); words holds (start_ms, end_ms, text) segments when
+    the payload has inline timestamps ("<00:00:01.500>"), otherwise None.
+    """
+    parts = VTT_INLINE_TIMESTAMP_RE.split(payload)
+    segments = []
+    segment_start = start_ms
+    for index in range(0, len(parts), 2):
+        segment_text = html.unescape(VTT_TAG_RE.sub("", parts[index]))
+        if index + 1 < len(parts):
+            timing = parse_srt_timing(f"{parts[index + 1]} --> {parts[index + 1]}")
+            segment_end = timing[0] if timing else segment_start
+        else:
+            segment_end = end_ms
+        segments.append((segment_start, segment_end, segment_text))
+        segment_start = segment_end
+
+    text = "".join(segment_text for _, _, segment_text in segments).strip()
+    if len(segments) == 1:
+        return text, None
+    words = [(segment_start, segment_end, segment_text.strip()) for segment_start, segment_end, segment_text in segments if segment_text.strip()]
+    return text, words or None
+
+def read_vtt(buffer):
+    """
+    WebVTT reader for read_subtitles
+
+    Cues are blank-line delimited blocks with a timing line; the header and
+    NOTE/STYLE/REGION blocks are skipped, cue settings after the timing are
+    ignored, and markup tags are removed from the text.
+    """
+    block = []
+    last_id = 0
+
+    def finish():
+        nonlocal last_id
+        timing_index = next((index for index, line in enumerate(block[:2]) if '-->' in line), None)
+        if timing_index is None:
+            return None
+        timing = parse_srt_timing(block[timing_index])
+        if timing is None:
+            return None
+        identifier = block[0].strip() if timing_index == 1 else ""
+        last_id = int(identifier) if identifier.isdigit() else last_id + 1
+        text, words = parse_vtt_payload('\n'.join(block[timing_index + 1:]), timing[0], timing[1])
+        if not text:
+            return None
+        return last_id, timing[0], timing[1], text, words
+
+    for line in iter_mapped_lines(buffer):
+        line = line.rstrip('\r\n').lstrip('\ufeff')
+        if line.strip():
+            block.append(line)
+            continue
+        if block:
+            cue = finish()
+            if cue:
+                yield cue
+            block.clear()
+    if block:
+        cue = finish()
+        if cue:
+            yield cue
+
+def parse_ass_time(value):
+    """Parse an ASS timestamp (H:MM:SS.cc) to milliseconds, or None if malformed"""
+    match = ASS_TIME_RE.match(value.strip())
+    if not match:
+        return None
+    hours, minutes, seconds, fraction = match.groups()
+    return ((int(hours) * 60 + int(minutes)) * 60 + int(seconds)) * 1000 + int(fraction.ljust(3, '0')[:3])
+
+def clean_ass_text(text):
+    """Drop ASS override blocks and turn \\N, \\n and \\h into line breaks and spaces"""
+    return ASS_OVERRIDE_RE.sub("", text).replace("\\N", "\n").replace("\\n", "\n").replace("\\h", " ")
+
+def parse_ass_karaoke(text, start_ms):
+    """
+    Word timings from the karaoke tags (\\k, \\kf, \\ko, \\K) of an ASS line
+    Syllables not separated by whitespace are merged into one word.
+    Returns a list of (start_ms, end_ms, word), or None without karaoke tags.
+    """
+    words = []
+    cursor = start_ms
+    duration = None
+    glued = False
+    found = False
+    for index, part in enumerate(ASS_OVERRIDE_SPLIT_RE.split(text)):
+        if index % 2:
+            match = ASS_KARAOKE_RE.search(part)
+            if match:
+                duration = int(match.group(1)) * 10
+                found = True
+            continue
+        if duration is None:
+            continue
+        syllable = clean_ass_text(part).replace("\n", " ")
+        syllable_end = cursor + duration
+        if syllable.strip():
+            if words and glued and not syllable[0].isspace():
+                word_start, _, word = words[-1]
+                words[-1] = (word_start, syllable_end, word + syllable.strip())
+            else:
+                words.append((cursor, syllable_end, syllable.strip()))
+            glued = not syllable[-1].isspace()
+        else:
+            glued = False
+        cursor = syllable_end
+        duration = None
+    return words if found and words else None
 
-            nid = row['id']
+def read_ass(buffer):
+    """
+    ASS/SSA reader for read_subtitles
+
+    Reads the Dialogue lines of the [Events] section using its Format line
+    (the default field order is assumed without one). Override tags are
+    removed from the text and karaoke tags become word timestamps.
+    """
+    in_events = False
+    fields = ASS_DEFAULT_EVENT_FORMAT
+    nid = 0
+
+    for line in iter_mapped_lines(buffer):
+        line = line.rstrip('\r\n').lstrip('\ufeff').strip()
+        if line.startswith('['):
+            in_events = line.lower() == '[events]'
+            continue
+        if not in_events:
+            continue
+        key, _, value = line.partition(':')
+        key = key.strip().lower()
+        if key == 'format':
+            fields = [field.strip().lower() for field in value.split(',')]
+            continue
+        if key != 'dialogue':
+            continue
+
+        values = dict(zip(fields, value.lstrip().split(',', len(fields) - 1)))
+        start_ms = parse_ass_time(values.get('start', ''))
+        end_ms = parse_ass_time(values.get('end', ''))
+        raw_text = values.get('text', '')
+        text = clean_ass_text(raw_text).strip()
+        if start_ms is None or end_ms is None or not text:
+            continue
+        nid += 1
+        yield nid, start_ms, end_ms, text, parse_ass_karaoke(raw_text, start_ms)
+
+def whisper_word_timings(words, start_ms, end_ms):
+    """
+    Convert Whisper word dicts to (start_ms, end_ms, word)
+    Words without timestamps (unaligned numbers or symbols) are given the gap
+    between their neighbours.
+    """
+    timed = []
+    for word in words:
+        text = str(word.get('word', word.get('text', ''))).strip()
+        if not text:
+            continue
+        word_start = word.get('start')
+        word_end = word.get('end')
+        timed.append([None if word_start is None else round(word_start * 1000), None if word_end is None else round(word_end * 1000), text])
+
+    previous_end = start_ms
+    for word in timed:
+        if word[0] is None:
+            word[0] = previous_end
+        previous_end = word[1] if word[1] is not None else word[0]
+    next_start = end_ms
+    for word in reversed(timed):
+        if word[1] is None:
+            word[1] = max(next_start, word[0])
+        next_start = word[0]
+    return [tuple(word) for word in timed] or None
+
+def read_whisper_json(buffer):
+    """
+    Whisper JSON reader for read_subtitles
+
+    Accepts the openai-whisper/faster-whisper/WhisperX layout ({"segments":
+    [{"start", "end", "text", "words": [{"word", "start", "end"}]}]}, or a bare
+    list of segments) and whisper.cpp's ({"transcription": [{"offsets":
+    {"from", "to"}, "text"}]}). Word timestamps are kept in CueStore.words.
+    """
+    # the json module needs the whole document, so this is the one reader
+    # that copies the mapped file
+    document = json.loads(buffer[:])
+    if isinstance(document, dict):
+        segments = document.get('segments', document.get('transcription', []))
+    else:
+        segments = document
 
+    nid = 0
+    for segment in segments:
+        if 'offsets' in segment:
+            start_ms = int(segment['offsets']['from'])
+            end_ms = int(segment['offsets']['to'])
+        else:
+            start_ms = round(segment['start'] * 1000)
+            end_ms = round(segment['end'] * 1000)
+        text = str(segment.get('text', '')).strip()
+        if not text:
+            continue
+        nid += 1
+        words = whisper_word_timings(segment['words'], start_ms, end_ms) if segment.get('words') else None
+        yield nid, start_ms, end_ms, text, words
+
+# subtitle readers by format name; a reader takes the memory-mapped file and
+# yields (id, start_ms, end_ms, text, words) tuples, see read_subtitles
+SUBTITLE_READERS = {
+    "srt": read_srt,
+    "vtt": read_vtt,
+    "ass": read_ass,
+    "whisper": read_whisper_json,
+}
+
+def detect_subtitle_format(buffer):
+    """Guess the format of a memory-mapped subtitle file from its first bytes"""
+    head = buffer[:SUBTITLE_DETECT_BYTES].decode('utf-8', errors='replace').lstrip('\ufeff \t\r\n')
+    if head.startswith('WEBVTT'):
+        return "vtt"
+    if head.startswith('{') or (head.startswith('[') and head[1:].lstrip().startswith(('{', ']'))):
+        return "whisper"
+    if head.lower().startswith('[script info]') or '\n[events]' in head.lower():
+        return "ass"
+    return "srt"
+
+def read_subtitles(file_path, subtitle_format=None):
+    """
+    Parse a subtitle file (SRT, WebVTT, ASS/SSA or Whisper JSON) into a CueStore
+
+    The format is detected from the content unless subtitle_format names one
+    of SUBTITLE_READERS. The file is memory-mapped and decoded line by line,
+    so large files are never held in memory twice; CRLF line endings and a
+    UTF-8 BOM are handled transparently.
+    """
+    cues = CueStore()
+
+    with profile_phase("parsing"), open(file_path, 'rb') as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return cues
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            if subtitle_format is None:
+                subtitle_format = detect_subtitle_format(buffer)
+            reader = SUBTITLE_READERS.get(subtitle_format)
+            if reader is None:
+                raise ValueError(f"Unknown subtitle format '{subtitle_format}'")
+            for nid, start_ms, end_ms, text, words in reader(buffer):
+                cues.append(nid, start_ms, end_ms, text, words)
+
+    return cues
+
+def srt2df(file_path):
+    """Parse an SRT file into a CueStore, see read_subtitles"""
+    return read_subtitles(file_path, "srt")
+
+def format_timestamp(ms, separator=','):
+    """Format integer milliseconds as HH:MM:SS,mmm (SRT) or HH:MM:SS.mmm (WebVTT)"""
+    hours, ms = divmod(max(ms, 0), 3600000)
+    minutes, ms = divmod(ms, 60000)
+    seconds, ms = divmod(ms, 1000)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}{separator}{ms:03d}"
+
+def write_subtitles(df, file_path, subtitle_format="srt"):
+    """
+    Write a CueStore (or list of dicts) to an SRT or WebVTT file
+
+    Cues are formatted with integer millisecond arithmetic and streamed through
+    a SUBTITLE_WRITE_BUFFER_SIZE buffered writer. Cues with id 0 are skipped.
+    WebVTT text is HTML-escaped, as the format requires.
+    Returns the number of cues written.
+    """
+    cues = as_cue_store(df)
+    vtt = subtitle_format == "vtt"
+    separator = '.' if vtt else ','
+    written = 0
+
+    with open(file_path, 'w', encoding='utf-8', newline='\n', buffering=SUBTITLE_WRITE_BUFFER_SIZE) as file:
+        if vtt:
+            file.write("WEBVTT\n\n")
+
+        for nid, start_ms, end_ms, text in zip(cues.ids, cues.start_ms, cues.end_ms, cues.texts):
             if nid == 0:
                 continue
-            
-            start_time = timedelta(seconds=row['start'])
-            hours, remainder = divmod(start_time.seconds, 3600)
-            minutes, seconds = divmod(remainder, 60)
-            milliseconds = start_time.microseconds // 1000
-            start_time_str = f"{hours:02d}:{minutes:02d}:{seconds:02d},{milliseconds:03d}"
-
-            end_time = timedelta(seconds=row['end'])
-            hours, remainder = divmod(end_time.seconds, 3600)
-            minutes, seconds = divmod(remainder, 60)
-            milliseconds = end_time.microseconds // 1000
-            end_time_str = f"{hours:02d}:{minutes:02d}:{seconds:02d},{milliseconds:03d}"
-
-            file.write(f"{nid}\n")
-            file.write(f"{start_time_str} --> {end_time_str}\n")
-            file.write(f"{row['text']}\n\n")
+
+            if vtt:
+                # a blank line would end the WebVTT cue early, and a raw "&",
+                # "<" or ">" would be read as markup; escaping ">" also
+                # keeps a "-->" in the text from looking like a timing line
+                text = html.escape('\n'.join(line for line in text.split('\n') if line.strip()), quote=False)
+
+            file.write(f"{nid}\n{format_timestamp(start_ms, separator)} --> {format_timestamp(end_ms, separator)}\n{text}\n\n")
+            written += 1
+
+    return written
+
+def df2srt(df, file_path):
+    return write_subtitles(df, file_path, "srt")
+
+def df2vtt(df, file_path):
+    return write_subtitles(df, file_path, "vtt")
+
+# ------------------------- text transformation functions -------------------------
+
+class TextTransformPipeline:
+    """
+    Compiled, single-pass text transformation rules
+
+    The rules are compiled once: word replacements and profanity masking into
+    one combined regex, the punctuation set into a str.translate table, then
+    the case conversion and max-chars-per-line rewrapping. They are applied
+    in that order, and results are memoized per distinct input text.
+
+    Args:
+        punctuation: Characters to remove ("" keeps punctuation)
+        case: One of CASE_TRANSFORMS
+        replacements: Dict of word -> replacement, matched on whole words,
+            exact case first then case-insensitively
+        profanity: Words to mask, matched case-insensitively on whole words
+        mask_char: Character replacing all but the first letter of masked words
+        max_chars_per_line: Rewrap each cue to lines of at most this many
+            characters (0 keeps the original line breaks)
+    """
+
+    def __init__(self, punctuation="", case="Keep Case", replacements=None, profanity=None, mask_char="*", max_chars_per_line=0):
+        if case not in CASE_TRANSFORMS:
+            raise ValueError(f"Unknown case transform '{case}'")
+        self.case_transform = CASE_TRANSFORMS[case]
+        self.translate_table = str.maketrans("", "", punctuation) if punctuation else None
+        self.replacements = dict(replacements or {})
+        self.lower_replacements = {word.lower(): replacement for word, replacement in self.replacements.items()}
+        self.mask_char = mask_char
+        self.max_chars_per_line = max_chars_per_line
+        self._cache = {}
+
+        words = set(self.replacements) | set(profanity or ())
+        if words:
+            alternation = "|".join(re.escape(word) for word in sorted(words, key=len, reverse=True))
+            self.word_re = re.compile(rf"(?<!\w)(?:{alternation})(?!\w)", re.IGNORECASE)
+        else:
+            self.word_re = None
+
+    @classmethod
+    def from_options(cls, remove_punctuation=True, text_transform="Keep Case", rules=None):
+        """
+        Build a pipeline from the UI presets plus optional user rules
+
+        rules is a dict with any of the constructor's keyword arguments; its
+        "punctuation" replaces the default set when remove_punctuation is on.
+        """
+        rules = dict(rules or {})
+        punctuation = rules.pop("punctuation", DEFAULT_PUNCTUATION)
+        return cls(punctuation=punctuation if remove_punctuation else "", case=text_transform, **rules)
+
+    def _substitute(self, match):
+        word = match.group(0)
+        replacement = self.replacements.get(word)
+        if replacement is None:
+            replacement = self.lower_replacements.get(word.lower())
+        if replacement is not None:
+            return replacement
+        return word[0] + self.mask_char * (len(word) - 1)
+
+    def _wrap(self, text):
+        lines = []
+        line = ""
+        for word in text.split():
+            if line and len(line) + 1 + len(word) > self.max_chars_per_line:
+                lines.append(line)
+                line = word
+            else:
+                line = f"{line} {word}" if line else word
+        if line:
+            lines.append(line)
+        return "\n".join(lines)
+
+    def apply(self, text):
+        result = self._cache.get(text)
+        if result is None:
+            result = text
+            if self.word_re is not None:
+                result = self.word_re.sub(self._substitute, result)
+            if self.translate_table is not None:
+                result = result.translate(self.translate_table)
+            if self.case_transform is not None:
+                result = self.case_transform(result)
+            if self.max_chars_per_line > 0:
+                result = self._wrap(result)
+            self._cache[text] = result
+        return result
+
+    def apply_all(self, texts):
+        """Transform a batch of texts, returning a list"""
+        return [self.apply(text) for text in texts]
+
+def load_text_rules(file_path):
+    """
+    Load user text rules from a JSON file
+
+    Keys: "punctuation" (str), "replacements" (dict), "profanity" (list),
+    "mask_char" (str) and "max_chars_per_line" (int), all optional.
+    """
+    with open(file_path, 'r', encoding='utf-8-sig') as file:
+        return check_text_rules(json.load(file))
+
+def check_text_rules(rules):
+    """Return rules if it is a dict of known text rules (see load_text_rules), raise ValueError otherwise"""
+    if not isinstance(rules, dict):
+        raise ValueError("Text rules must be a JSON object")
+    unknown = set(rules) - TEXT_RULE_KEYS
+    if unknown:
+        raise ValueError(f"Unknown text rules: {', '.join(sorted(unknown))}")
+    return rules
 
 def remove_ponctuation(text):
-    ponctuation = [".", ","]
-    for ponctuation in ponctuation:
-        text = text.replace(ponctuation, "")
-    return text
+    return text.translate(_DEFAULT_PUNCTUATION_TABLE)
+
+def apply_text_transform(text, transform):
+    case_transform = CASE_TRANSFORMS.get(transform)
+    return case_transform(text) if case_transform else text
+
+# ------------------------- cue timing functions -------------------------
+
+def parse_frame_rate(value):
+    """
+    Return a timeline frame rate as an exact Fraction
+
+    Resolve reports NTSC rates rounded ("23.976", "29.97", "59.94"), they are
+    mapped back to their exact n*1000/1001 value.
+    """
+    rate = Fraction(str(value).strip())
+    nominal = round(rate)
+    ntsc_rate = Fraction(nominal * 1000, 1001)
+    if rate != nominal and abs(rate - ntsc_rate) < Fraction(1, 100):
+        return ntsc_rate
+    return rate.limit_denominator(1001)
+
+def ms_to_frame(ms, frame_rate):
+    """Convert milliseconds to the nearest frame with integer arithmetic (frame_rate is a Fraction)"""
+    numerator = ms * frame_rate.numerator
+    denominator = 1000 * frame_rate.denominator
+    return (2 * numerator + denominator) // (2 * denominator)
+
+def frame_to_ms(frame, frame_rate):
+    numerator = frame * 1000 * frame_rate.denominator
+    denominator = frame_rate.numerator
+    return (2 * numerator + denominator) // (2 * denominator)
+
+def quantize_cues(cues, frame_rate, overlap_policy="trim", min_frames=1, max_gap_frames=0):
+    """
+    Quantize cues to integer frames and resolve overlaps with a sweep line
+
+    Every cue is converted to frames once with exact rational arithmetic,
+    then the cues are swept in start order. Overlaps are resolved according
+    to overlap_policy:
+        trim: the earlier cue ends where the later one starts
+        shift: the later cue is delayed until the earlier one ends
+        spill: the later cue goes to the first extra lane that is free
+    Cues shorter than min_frames are lengthened. When trimming would leave
+    the earlier cue shorter than min_frames (cues starting on the same frame),
+    the later cue is moved to start after it instead, so no cue is dropped.
+    Gaps of up to max_gap_frames are closed by extending the earlier cue.
+    Cues with id 0 or an end before their start are skipped.
+
+    Returns a list of lanes, each a list of [index, start_frame, end_frame]
+    in start order without overlaps. Lane 0 always exists.
+    """
+    if overlap_policy not in OVERLAP_POLICIES:
+        raise ValueError(f"Unknown overlap policy '{overlap_policy}'")
+
+    placements = []
+    for index in range(len(cues)):
+        if cues.ids[index] == 0 or cues.end_ms[index] <= cues.start_ms[index]:
+            continue
+        start_frame = ms_to_frame(cues.start_ms[index], frame_rate)
+        end_frame = max(ms_to_frame(cues.end_ms[index], frame_rate), start_frame + min_frames)
+        placements.append([index, start_frame, end_frame])
+    placements.sort(key=lambda placement: (placement[1], placement[2], placement[0]))
+
+    lanes = [[]]
+    for placement in placements:
+        if overlap_policy == "spill":
+            for lane in lanes:
+                if not lane or lane[-1][2] <= placement[1]:
+                    break
+            else:
+                lane = []
+                lanes.append(lane)
+        else:
+            lane = lanes[0]
+
+        if lane:
+            previous = lane[-1]
+            if placement[1] < previous[2]:
+                if overlap_policy == "trim" and placement[1] - previous[1] >= min_frames:
+                    previous[2] = placement[1]
+                else:
+                    # shift, or a trim that would leave the earlier cue too short
+                    duration = placement[2] - placement[1]
+                    placement[1] = previous[2]
+                    placement[2] = previous[2] + duration if overlap_policy == "shift" else max(placement[2], previous[2] + min_frames)
+            elif placement[1] - previous[2] <= max_gap_frames:
+                previous[2] = placement[1]
+
+        lane.append(placement)
+
+    return lanes
+
+def split_cues_into_words(cues, words_per_group=1):
+    """
+    Split every cue into groups of words_per_group words (karaoke-style captions)
+
+    A group is timed from the cue's word timestamps when the store has them,
+    otherwise the cue's duration is shared between its groups in proportion
+    to their character count. Returns a new CueStore with sequential ids;
+    cues with id 0 are dropped.
+    """
+    if words_per_group < 1:
+        raise ValueError("words_per_group must be at least 1")
+
+    groups = CueStore()
+    nid = 1
+
+    for index in range(len(cues)):
+        if cues.ids[index] == 0:
+            continue
+
+        timed_words = cues.words.get(index)
+        if timed_words:
+            for group_start in range(0, len(timed_words), words_per_group):
+                group = timed_words[group_start:group_start + words_per_group]
+                groups.append(nid, group[0][0], group[-1][1], " ".join(word for _, _, word in group), group)
+                nid += 1
+            continue
+
+        words = cues.texts[index].split()
+        if not words:
+            continue
+        word_groups = [words[group_start:group_start + words_per_group] for group_start in range(0, len(words), words_per_group)]
+        weights = [sum(len(word) for word in group) for group in word_groups]
+        total_weight = sum(weights)
+        start_ms = cues.start_ms[index]
+        duration = cues.end_ms[index] - start_ms
+        weight_done = 0
+        for group, weight in zip(word_groups, weights):
+            group_start_ms = start_ms + duration * weight_done // total_weight
+            weight_done += weight
+            group_end_ms = start_ms + duration * weight_done // total_weight
+            groups.append(nid, group_start_ms, group_end_ms, " ".join(group))
+            nid += 1
+
+    return groups
+
+# ------------------------- resolve timeline functions -------------------------
+
+class SnapshotItem:
+    """A timeline item with its start/end/name and Text+ tool fetched once"""
+
+    __slots__ = ("item", "start", "end", "name", "text_tool")
+
+    def __init__(self, item):
+        self.item = item
+        self.start = item.GetStart()
+        self.end = item.GetEnd()
+        self.name = item.GetName()
+        self.text_tool = None
+        if self.name == "Text+":
+            fusion_comp = item.GetFusionCompByIndex(1)
+            if fusion_comp:
+                self.text_tool = fusion_comp.FindToolByID("TextPlus")
+
+class TimelineSnapshot:
+    """
+    Memoized read-only view of a timeline's video tracks
+
+    The frame rate and track names are fetched on first use, the items of a
+    track the first time that track is asked for. Everything is then served
+    from memory until invalidate() is called, which callers must do after
+    mutating the timeline or when the user may have edited it.
+    """
+
+    def __init__(self, timeline):
+        self.timeline = timeline
+        self.invalidate()
+
+    def invalidate(self):
+        self._frame_rate = None
+        self._rational_frame_rate = None
+        self._track_names = None
+        self._track_indices = None
+        self._items = {}
+
+    @property
+    def frame_rate(self):
+        if self._frame_rate is None:
+            self._frame_rate = float(self.rational_frame_rate)
+        return self._frame_rate
+
+    @property
+    def rational_frame_rate(self):
+        if self._rational_frame_rate is None:
+            self._rational_frame_rate = parse_frame_rate(self.timeline.GetSetting('timelineFrameRate'))
+        return self._rational_frame_rate
+
+    def _load_tracks(self):
+        track_count = self.timeline.GetTrackCount("video")
+        self._track_names = [self.timeline.GetTrackName("video", i) for i in range(1, track_count + 1)]
+        self._track_indices = {}
+        for index, track_name in enumerate(self._track_names, start=1):
+            self._track_indices.setdefault(track_name, index)
+
+    @property
+    def track_names(self):
+        if self._track_names is None:
+            self._load_tracks()
+        return self._track_names
+
+    def track_index(self, track_name):
+        """Return the 1-based index of the first video track with this name, or None"""
+        if self._track_indices is None:
+            self._load_tracks()
+        return self._track_indices.get(track_name)
+
+    def items(self, track_name):
+        """Return the SnapshotItems of a named video track (empty if it does not exist)"""
+        track_index = self.track_index(track_name)
+        if track_index is None:
+            return []
+        if track_index not in self._items:
+            track = self.timeline.GetItemListInTrack("video", track_index) or []
+            self._items[track_index] = [SnapshotItem(item) for item in track]
+        return self._items[track_index]
+
+    def item(self, track_name, index):
+        return self.items(track_name)[index]
+
+def get_timeline_snapshot(timeline):
+    """Return the shared TimelineSnapshot of a timeline, creating it on first use"""
+    key = timeline.GetUniqueId()
+    snapshot = _timeline_snapshots.get(key)
+    if snapshot is None:
+        snapshot = _timeline_snapshots[key] = TimelineSnapshot(timeline)
+    else:
+        snapshot.timeline = timeline
+    return snapshot
+
+def invalidate_timeline_snapshot(timeline):
+    if timeline is None:
+        return
+    snapshot = _timeline_snapshots.get(timeline.GetUniqueId())
+    if snapshot is not None:
+        snapshot.invalidate()
+
+def timelineText2df(timeline, marker):
+    df = CueStore()
+    if timeline:
+        snapshot = get_timeline_snapshot(timeline)
+        frame_rate = snapshot.rational_frame_rate
+        nid = 1
+        for entry in snapshot.items(marker):
+            if entry.text_tool:
+                text_content = entry.text_tool.GetInput("StyledText") or ""
+                df.append(nid, frame_to_ms(entry.start, frame_rate), frame_to_ms(entry.end, frame_rate), text_content)
+                nid += 1
+    return df
+
+def export_track_to_subtitles(timeline, track_name, file_path, subtitle_format=None):
+    """
+    Export the Text+ clips of a named video track to an SRT or WebVTT file
+
+    The format is taken from the file extension when subtitle_format is None.
+    The track is re-read from Resolve, so edits made since the timeline
+    snapshot was taken are exported. Returns the number of cues written.
+    """
+    if subtitle_format is None:
+        subtitle_format = "vtt" if file_path.lower().endswith(".vtt") else "srt"
+
+    invalidate_timeline_snapshot(timeline)
+    df = timelineText2df(timeline, track_name)
+    written = write_subtitles(df, file_path, subtitle_format)
+    logger.info("Exported %d cues from track '%s' to %s", written, track_name, file_path)
+    return written
+
+# ------------------------- srt file functions -------------------------
+
+def df2timelineText(df, timeline, marker):
+    cues = as_cue_store(df)
+    text_by_id = dict(zip(cues.ids, cues.texts))
+    if timeline:
+        nid = 1
+        for entry in get_timeline_snapshot(timeline).items(marker):
+            if entry.text_tool and nid in text_by_id:
+                entry.text_tool.SetInput("StyledText", text_by_id[nid])
+                nid += 1
+
+def sync_track_from_cues(timeline, track_name, df, template_name=None, project=None, text_pipeline=None, overlap_policy="trim", cancel_event=None):
+    """
+    Re-sync an existing Text+ track with an edited cue list, touching only what changed
+
+    The new cues are prepared like a new track (quantized with overlap_policy,
+    "spill" is treated as "trim" since a single track is synced, and run
+    through text_pipeline), then diffed against the track's Text+ clips by
+    frame range:
+        same range, same text: left alone
+        same range, other text: StyledText updated in place
+        range only in the track: clip deleted (one DeleteClips call)
+        range only in the cues: clip inserted (batched AppendToTimeline)
+    A retimed cue is therefore a delete plus an insert. New clips use
+    template_name, or the template of the track's existing clips when None.
+
+    Nothing is deleted or retexted until every new clip is in place: new
+    clips are inserted first, apart from those overlapping a stale clip,
+    which replace it. If an insert fails or cancel_event is set, the new
+    clips are removed and the replaced ones re-created, leaving the track
+    as it was.
+
+    Returns a dict with the unchanged/updated/deleted/inserted counts, or
+    None if the track or a template cannot be found, an insert failed or
+    the sync was cancelled.
+    """
+    if not timeline:
+        logger.error("No timeline open")
+        return None
+    cues = as_cue_store(df)
+    snapshot = get_timeline_snapshot(timeline)
+    track_index = snapshot.track_index(track_name)
+    if track_index is None:
+        logger.error("Track '%s' not found", track_name)
+        return None
+
+    if text_pipeline is None:
+        text_pipeline = TextTransformPipeline.from_options()
+    prepared = prepare_cues(cues, snapshot.rational_frame_rate, text_pipeline, "trim" if overlap_policy == "spill" else overlap_policy)
+
+    existing = {}
+    for entry in snapshot.items(track_name):
+        if entry.text_tool:
+            existing.setdefault((entry.start, entry.end), []).append(entry)
+
+    updates = []
+    inserts = []
+    unchanged = 0
+    for (index, start_frame, end_frame), text in zip(prepared.lanes[0], prepared.texts):
+        matches = existing.get((start_frame, end_frame))
+        if not matches:
+            inserts.append((index, start_frame, end_frame, text))
+            continue
+        entry = matches.pop()
+        if not matches:
+            del existing[(start_frame, end_frame)]
+        if (entry.text_tool.GetInput("StyledText") or "") == text:
+            unchanged += 1
+        else:
+            updates.append((entry, text))
+    deletes = [entry for entries in existing.values() for entry in entries]
+
+    text_clip = None
+    if project is None:
+        project = get_current_project()
+    media_pool = project.GetMediaPool()
+    if inserts:
+        if template_name:
+            text_clip = find_text_plus_template_by_name(media_pool, template_name)
+        else:
+            for entry in snapshot.items(track_name):
+                if entry.text_tool:
+                    text_clip = entry.item.GetMediaPoolItem()
+                    break
+        if not text_clip:
+            logger.error("Text+ template '%s' not found in Media Pool", template_name or "of the track")
+            return None
+
+    logger.info("Sync '%s': %d unchanged, %d to update, %d to delete, %d to insert", track_name, unchanged, len(updates), len(deletes), len(inserts))
+    if cancel_event is not None and cancel_event.is_set():
+        logger.info("Sync cancelled, track '%s' left unchanged", track_name)
+        return None
+
+    # new clips are placed before any stale clip is deleted, except those
+    # overlapping a stale clip, which can only be placed once it is gone
+    stale = sorted(deletes, key=lambda entry: entry.start)
+    stale_ends = [entry.end for entry in stale]
+    blocking = {}
+    free_clips = []
+    blocked_clips = []
+    for index, start_frame, end_frame, text in inserts:
+        clip = (cues.ids[index], text_clip, start_frame, end_frame, text)
+        position = bisect.bisect_right(stale_ends, start_frame)
+        blocked = False
+        while position < len(stale) and stale[position].start < end_frame:
+            blocking[id(stale[position])] = stale[position]
+            blocked = True
+            position += 1
+        (blocked_clips if blocked else free_clips).append(clip)
+
+    transaction = TimelineTransaction(timeline)
+    removed = []
+    failed_ids = []
+    try:
+        if free_clips:
+            failed_ids = append_text_clips(media_pool, timeline, track_index, snapshot.frame_rate, free_clips, transaction, cancel_event)
+        if blocked_clips and not failed_ids and not (cancel_event is not None and cancel_event.is_set()):
+            removed = [(None, entry.item.GetMediaPoolItem(), entry.start, entry.end, entry.text_tool.GetInput("StyledText") or "") for entry in blocking.values()]
+            if not timeline.DeleteClips([entry.item for entry in blocking.values()], False):
+                logger.error("Could not delete the clips replaced by retimed cues")
+                failed_ids = [clip[0] for clip in blocked_clips]
+            else:
+                failed_ids = append_text_clips(media_pool, timeline, track_index, snapshot.frame_rate, blocked_clips, transaction, cancel_event)
+    except BaseException:
+        restore_sync(transaction, media_pool, timeline, track_index, snapshot, removed)
+        raise
+
+    if failed_ids or (cancel_event is not None and cancel_event.is_set()):
+        if failed_ids and not (cancel_event is not None and cancel_event.is_set()):
+            logger.warning("%d subtitles could not be inserted (ids %s)", len(failed_ids), summarize_ids(failed_ids))
+        logger.info("Sync of track '%s' %s, rolling back", track_name, "cancelled" if cancel_event is not None and cancel_event.is_set() else "failed")
+        restore_sync(transaction, media_pool, timeline, track_index, snapshot, removed)
+        return None
+
+    remaining = [entry.item for entry in deletes if id(entry) not in blocking]
+    if remaining and not timeline.DeleteClips(remaining, False):
+        logger.warning("Some stale clips of track '%s' could not be deleted", track_name)
+
+    for entry, text in updates:
+        entry.text_tool.SetInput("StyledText", text)
+
+    snapshot.invalidate()
+    return {"unchanged": unchanged, "updated": len(updates), "deleted": len(deletes), "inserted": len(inserts)}
+
+def append_text_clips(media_pool, timeline, track_index, fps, clips, transaction, cancel_event=None):
+    """
+    Append and style (key, text_clip, start_frame, end_frame, text) clips on one track
+
+    Clips are appended in batches per template and recorded in transaction.
+    Returns the keys of the clips that could not be created or styled,
+    including those never sent because cancel_event was set.
+    """
+    failed_keys = []
+    clips_by_template = {}
+    for clip in clips:
+        clips_by_template.setdefault(id(clip[1]), []).append(clip)
+
+    for group in clips_by_template.values():
+        text_clip = group[0][1]
+        # the track already holds captions, so a cold multiplier cache is
+        # probed on a temporary track
+        duration_multiplier = get_duration_multiplier(media_pool, timeline, text_clip, None, fps)
+        placements = [[position, start_frame, end_frame] for position, (_, _, start_frame, end_frame, _) in enumerate(group)]
+        clip_infos, _ = build_text_clip_infos(None, text_clip, track_index, placements, duration_multiplier)
+        timeline_items = append_clips_in_batches(media_pool, clip_infos, cancel_event=cancel_event)
+        transaction.record_items(timeline_items)
+        for timeline_item, (key, _, _, _, text) in zip(timeline_items, group):
+            if timeline_item is None:
+                failed_keys.append(key)
+                continue
+            timeline_item.SetClipColor("Green")
+            comp = timeline_item.GetFusionCompByIndex(1)
+            text_tool = comp.FindToolByID("TextPlus") if comp else None
+            if text_tool:
+                text_tool.SetInput("StyledText", text)
+            else:
+                failed_keys.append(key)
+
+    return failed_keys
+
+def restore_sync(transaction, media_pool, timeline, track_index, snapshot, removed):
+    """Undo a failed sync: remove the clips it added and re-create the stale clips it had deleted"""
+    transaction.rollback()
+    if removed and append_text_clips(media_pool, timeline, track_index, snapshot.frame_rate, removed, TimelineTransaction(timeline)):
+        logger.error("Some deleted clips could not be restored on track %d", track_index)
+    snapshot.invalidate()
+
+def df2NewtimelineText(df, timeline, template_name, remove_punctuation=True, text_transform="Keep Case", progress=None, cancel_event=None, project=None, overlap_policy="trim", text_pipeline=None):
+    """
+    Create new Text+ clips from SRT dataframe on timeline
+    
+    Args:
+        df: CueStore (or list of dicts) with subtitle data
+        timeline: DaVinci Resolve timeline object
+        template_name: Name of the Text+ template to use
+        remove_punctuation: Whether to remove punctuation from text
+        text_transform: Case conversion applied to the text
+        progress: Optional callback(phase, done, total), phase is "insert" or "style"
+        cancel_event: Optional threading.Event, checked between batches
+        project: Project owning the timeline, defaults to the current project
+        overlap_policy: How overlapping cues are resolved, one of OVERLAP_POLICIES
+            ("spill" adds an extra track per overlapping layer)
+        text_pipeline: Optional TextTransformPipeline, replaces the
+            remove_punctuation/text_transform presets
+    """
+    df = as_cue_store(df)
+    if not timeline or not df:
+        logger.error("No timeline or empty dataframe")
+        return False
+
+    logger.info("Creating Text+ clips from %d cues using template: %s", len(df), template_name)
+
+    if text_pipeline is None:
+        text_pipeline = TextTransformPipeline.from_options(remove_punctuation, text_transform)
+    prepared = prepare_cues(df, get_timeline_snapshot(timeline).rational_frame_rate, text_pipeline, overlap_policy)
+    return insert_prepared_track(prepared, timeline, template_name, project=project, progress=progress, cancel_event=cancel_event)
+
+class PreparedTrack:
+    """
+    Cues ready for insertion: quantized lanes and transformed texts
+
+    texts holds the final text of every placement, in lane order (all the
+    placements of lane 0, then lane 1...).
+    """
+
+    __slots__ = ("cues", "lanes", "texts")
+
+    def __init__(self, cues, lanes, texts):
+        self.cues = cues
+        self.lanes = lanes
+        self.texts = texts
+
+def prepare_cues(cues, frame_rate, text_pipeline, overlap_policy="trim"):
+    """Quantize and transform a CueStore without touching Resolve"""
+    lanes = quantize_cues(cues, frame_rate, overlap_policy)
+    texts = text_pipeline.apply_all(cues.texts[placement[0]] for lane in lanes for placement in lane)
+    return PreparedTrack(cues, lanes, texts)
+
+def prepare_caption_track(srt_path, frame_rate, text_pipeline, overlap_policy="trim", words_per_group=0):
+    """Parse, split, quantize and transform one subtitle file; safe to run on a worker thread"""
+    cues = read_subtitles(srt_path)
+    if words_per_group:
+        cues = split_cues_into_words(cues, words_per_group)
+    return prepare_cues(cues, frame_rate, text_pipeline, overlap_policy)
+
+class TimelineTransaction:
+    """
+    The video tracks and timeline items added by one operation, so that a
+    failed or cancelled operation can remove all of them at once
+
+    rollback() deletes every recorded item with a single DeleteClips call,
+    then the recorded tracks with DeleteTrack from the highest index down so
+    the indices still to be deleted stay valid.
+    """
+
+    def __init__(self, timeline):
+        self.timeline = timeline
+        self.track_indices = []
+        self.items = []
 
-def apply_text_transform(text, transform):
-    if transform == "Lowercase":
-        return text.lower()
-    elif transform == "Uppercase":
-        return text.upper()
-    elif transform == "Capitalize All Words":
-        return text.title()
-    else:
-        return text
+    def add_track(self):
+        """Add a video track and return its index, or None if Resolve refused"""
+        if not self.timeline.AddTrack("video"):
+            return None
+        track_index = self.timeline.GetTrackCount("video")
+        self.track_indices.append(track_index)
+        return track_index
 
-# ------------------------- resolve timeline functions -------------------------
+    def record_items(self, items):
+        self.items.extend(item for item in items if item is not None)
 
-def timelineText2df(timeline, marker):
-    df = []
-    if timeline:
-        track_count = timeline.GetTrackCount("video")
-        for i in range(1, track_count + 1):
-            track = timeline.GetItemListInTrack("video", i)
-            if track:
-                track_name = timeline.GetTrackName("video", i)
-                if track_name == marker:
-                    nid = 1
-                    for item in track:
-                        if item.GetName() == "Text+":
-                            start_time = item.GetStart() / timeline.GetSetting('timelineFrameRate')
-                            end_time = item.GetEnd() / timeline.GetSetting('timelineFrameRate')
-                            fusion_comp = item.GetFusionCompByIndex(1)
-                            if fusion_comp:
-                                text_tool = fusion_comp.FindToolByID("TextPlus")
-                                if text_tool:
-                                    text_content = text_tool.GetInput("StyledText")
-                                    df.append({'id': nid, 'start': start_time, 'end': end_time, 'text': text_content})
-                                    nid += 1
-    return df
+    def rollback(self):
+        """Remove everything recorded; returns False if Resolve refused part of it"""
+        if not self.items and not self.track_indices:
+            return True
+        complete = True
+        if self.items and not self.timeline.DeleteClips(self.items, False):
+            complete = False
+        for track_index in sorted(self.track_indices, reverse=True):
+            if not self.timeline.DeleteTrack("video", track_index):
+                complete = False
+        if complete:
+            logger.info("Rolled back %d clips on %d tracks", len(self.items), len(self.track_indices))
+        else:
+            logger.error("Rollback incomplete: some of %d clips on tracks %s could not be removed", len(self.items), summarize_ids(sorted(self.track_indices)))
+        self.items = []
+        self.track_indices = []
+        invalidate_timeline_snapshot(self.timeline)
+        return complete
 
-# ------------------------- srt file functions -------------------------
+def summarize_ids(ids, limit=10):
+    """Format ids for a log message, eliding all but the first limit ones"""
+    return ", ".join(map(str, ids[:limit])) + ("..." if len(ids) > limit else "")
 
-def df2timelineText(df, timeline, marker):
-    if timeline:
-        track_count = timeline.GetTrackCount("video")
-        for i in range(1, track_count + 1):
-            track = timeline.GetItemListInTrack("video", i)
-            if track:
-                track_name = timeline.GetTrackName("video", i)
-                nid = 1
-                if track_name == marker:
-                    for item in track:
-                        if item.GetName() == "Text+":
-                            start_time = item.GetStart() / timeline.GetSetting('timelineFrameRate')
-                            end_time = item.GetEnd() / timeline.GetSetting('timelineFrameRate')
-                            fusion_comp = item.GetFusionCompByIndex(1)
-                            if fusion_comp:
-                                text_tool = fusion_comp.FindToolByID("TextPlus")
-                                if text_tool:
-                                    for row in df:
-                                        if row['id'] == nid:
-                                            text_tool.SetInput("StyledText", row['text'])
-                                            nid += 1
-                                            break
-
-def df2NewtimelineText(df, timeline, template_name, remove_punctuation=True, text_transform="Keep Case"):
+def insert_prepared_track(prepared, timeline, template_name, project=None, progress=None, cancel_event=None, transaction=None):
     """
-    Create new Text+ clips from SRT dataframe on timeline
-    
-    Args:
-        df: list of dicts with subtitle data
-        timeline: DaVinci Resolve timeline object
-        template_name: Name of the Text+ template to use
-        remove_punctuation: Whether to remove punctuation from text
+    Insert a PreparedTrack as new Text+ track(s) on the timeline
+
+    Looks up the template, adds one video track per lane, then appends all
+    clips in batches and styles them. See df2NewtimelineText for the
+    progress and cancel_event arguments. Returns True on success, False if
+    cancelled or if any clip could not be created or styled.
+
+    The tracks and clips created are recorded in transaction, whose owner
+    rolls them back. Without one the track is its own transaction and is
+    rolled back here before returning False.
     """
-    if not timeline or not df:
-        print("No timeline or empty dataframe")
+    if transaction is not None:
+        return _insert_prepared_track(prepared, timeline, template_name, project, progress, cancel_event, transaction)
+
+    transaction = TimelineTransaction(timeline)
+    try:
+        success = _insert_prepared_track(prepared, timeline, template_name, project, progress, cancel_event, transaction)
+    except BaseException:
+        transaction.rollback()
+        raise
+    if not success:
+        transaction.rollback()
+    return success
+
+def _insert_prepared_track(prepared, timeline, template_name, project, progress, cancel_event, transaction):
+    df = prepared.cues
+    lanes = prepared.lanes
+    if not lanes[0]:
+        logger.error("No cue with a valid duration")
         return False
 
-    print(f"Creating Text+ clips from SRT file: {df} using template: {template_name}")
-    
+    if project is None:
+        project = get_current_project()
     media_pool = project.GetMediaPool()
-    root_folder = media_pool.GetRootFolder()
     
-    text_clip = find_text_plus_template_by_name(media_pool, template_name)    
+    with profile_phase("template lookup"):
+        text_clip = find_text_plus_template_by_name(media_pool, template_name)
     if not text_clip:
-        print(f"Text+ template '{template_name}' not found in Media Pool.")
-        print("Available templates:")
+        logger.error("Text+ template '%s' not found in Media Pool", template_name)
         list_available_templates(media_pool)
         return False
     
-    print(f"Found Text+ template: {text_clip.GetClipProperty('Clip Name')}")
+    logger.info("Found Text+ template: %s", text_clip.GetClipProperty('Clip Name'))
     
-    track_added = timeline.AddTrack("video")
-    if not track_added:
-        print("Failed to add new video track")
-        return False
+    fps = get_timeline_snapshot(timeline).frame_rate
     
-    track_count = timeline.GetTrackCount("video")
+    track_indices = []
+    for _ in lanes:
+        track_index = transaction.add_track()
+        if track_index is None:
+            logger.error("Failed to add new video track")
+            return False
+        track_indices.append(track_index)
+    invalidate_timeline_snapshot(timeline)
+    if len(lanes) > 1:
+        logger.info("Overlapping cues spill over %d tracks", len(lanes))
     
-    fps = float(timeline.GetSetting('timelineFrameRate'))
+    with profile_phase("multiplier probe"):
+        duration_multiplier = get_duration_multiplier(media_pool, timeline, text_clip, track_indices[0], fps)
     
-    duration_multiplier = 1.0
+    clip_infos = []
+    indices = []
+    for lane, track_index in zip(lanes, track_indices):
+        lane_infos, lane_indices = build_text_clip_infos(df, text_clip, track_index, lane, duration_multiplier)
+        clip_infos.extend(lane_infos)
+        indices.extend(lane_indices)
+    with profile_phase("insertion"):
+        timeline_items = append_clips_in_batches(media_pool, clip_infos, progress=progress, cancel_event=cancel_event)
+    transaction.record_items(timeline_items)
+    if cancel_event is not None and cancel_event.is_set():
+        logger.info("Cancelled during clip insertion")
+        return False
+
+    texts = prepared.texts
+    created_clips = []
+    failed_ids = []
+    progress_log = ProgressLog("Styling", len(indices))
+    log_cues = logger.isEnabledFor(logging.DEBUG)
+
+    with profile_phase("styling"):
+        for done, (index, timeline_item) in enumerate(zip(indices, timeline_items)):
+            if done % APPEND_BATCH_SIZE == 0:
+                if cancel_event is not None and cancel_event.is_set():
+                    logger.info("Cancelled during styling")
+                    return False
+                if progress is not None:
+                    progress("style", done, len(indices))
+            progress_log.update(done)
+
+            nid = df.ids[index]
+            text = texts[done]
+            if timeline_item is None:
+                failed_ids.append(nid)
+                logger.debug("Failed to create timeline item for subtitle %d", nid)
+                continue
+
+            timeline_item.SetClipColor("Green")
+
+            # GetFusionCompByIndex returns None when the item has no comp
+            comp = timeline_item.GetFusionCompByIndex(1)
+            if comp:
+                text_tool = comp.FindToolByID("TextPlus")
+                if text_tool:
+                    text_tool.SetInput("StyledText", text)
+                    created_clips.append(timeline_item)
+                    if log_cues:
+                        logger.debug("Created subtitle %d: %s%s", nid, text[:50], '...' if len(text) > 50 else '')
+                    continue
+            failed_ids.append(nid)
+            logger.debug("No Fusion composition or TextPlus tool for subtitle %d", nid)
+
+    if progress is not None:
+        progress("style", len(indices), len(indices))
+
+    if failed_ids:
+        logger.error("%d subtitles could not be created or styled (ids %s)", len(failed_ids), summarize_ids(failed_ids))
+        return False
+    logger.info("Created %d Text+ clips", len(created_clips))
+    return True
+
+def probe_duration_multiplier(media_pool, timeline, text_clip, track_index=None):
+    """
+    Measure how many timeline frames one template frame lasts
+
+    Appends a 100-frame test clip at the start of track_index, which must be
+    empty, reads its duration and deletes it again. When track_index is None
+    the probe runs on a temporary video track that is removed afterwards.
+    Returns None if the probe fails.
+    """
+    transaction = TimelineTransaction(timeline)
     try:
+        if track_index is None:
+            track_index = transaction.add_track()
+            if track_index is None:
+                logger.warning("Could not add a track to measure the duration multiplier")
+                return None
+
         test_duration = 100
         test_clip = {
             "mediaPoolItem": text_clip,
             "startFrame": 0,
             "endFrame": test_duration - 1,
-            "trackIndex": track_count,
+            "trackIndex": track_index,
             "recordFrame": 0
         }
-        
+
         test_items = media_pool.AppendToTimeline([test_clip])
-        if test_items and len(test_items) > 0:
-            test_item = test_items[0]
-            test_duration_real = test_item.GetDuration()
-            timeline.DeleteClips([test_item], False)
-            duration_multiplier = test_duration / test_duration_real if test_duration_real > 0 else 1.0
-        
-        print(f"Duration multiplier: {duration_multiplier:.3f}")
+        if not test_items:
+            logger.warning("Resolve refused the test clip used to measure the duration multiplier")
+            return None
+        transaction.record_items(test_items[:1])
+        test_duration_real = test_items[0].GetDuration()
+        if test_duration_real > 0:
+            return test_duration / test_duration_real
+        logger.warning("The test clip used to measure the duration multiplier has no duration")
     except Exception as e:
-        print(f"Warning: Could not calculate duration multiplier, using 1.0: {e}")
-        duration_multiplier = 1.0
-    
-    created_clips = []
-    
-    for row in df:
-        if row['id'] == 0:
-            continue
-            
-        start_frame = int(row['start'] * fps)
-        end_frame = int(row['end'] * fps)
-        duration = end_frame - start_frame
-        
-        new_clip = {
+        logger.warning("Could not calculate duration multiplier: %s", e)
+    finally:
+        transaction.rollback()
+    return None
+
+def load_duration_multipliers():
+    global _duration_multipliers
+    if _duration_multipliers is None:
+        try:
+            with open(DURATION_MULTIPLIER_CACHE_PATH, 'r', encoding='utf-8') as file:
+                _duration_multipliers = json.load(file)
+        except (OSError, ValueError):
+            _duration_multipliers = {}
+    return _duration_multipliers
+
+def save_duration_multipliers():
+    try:
+        os.makedirs(os.path.dirname(DURATION_MULTIPLIER_CACHE_PATH), exist_ok=True)
+        temp_path = DURATION_MULTIPLIER_CACHE_PATH + ".tmp"
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            json.dump(load_duration_multipliers(), file, indent=1, sort_keys=True)
+        os.replace(temp_path, DURATION_MULTIPLIER_CACHE_PATH)
+    except OSError as e:
+        logger.warning("Could not save duration multiplier cache: %s", e)
+
+def get_duration_multiplier(media_pool, timeline, text_clip, track_index, fps):
+    """
+    Return the duration multiplier of a template at the timeline frame rate
+
+    Multipliers are cached per (template, frame rate) in memory and in
+    DURATION_MULTIPLIER_CACHE_PATH. A cached value is only reused while the
+    template's own frame rate and duration are unchanged; otherwise the
+    template is probed again, on track_index if that track is still empty
+    or on a temporary track when it is None (see probe_duration_multiplier).
+    """
+    multipliers = load_duration_multipliers()
+    key = f"{text_clip.GetUniqueId()}@{fps:g}"
+    signature = f"{text_clip.GetClipProperty('FPS')}|{text_clip.GetClipProperty('Duration')}"
+
+    cached = multipliers.get(key)
+    if cached and cached.get("signature") == signature:
+        logger.info("Duration multiplier: %.3f (cached)", cached['multiplier'])
+        return cached["multiplier"]
+
+    duration_multiplier = probe_duration_multiplier(media_pool, timeline, text_clip, track_index)
+    if duration_multiplier is None:
+        logger.warning("Using a duration multiplier of 1.0")
+        return 1.0
+
+    logger.info("Duration multiplier: %.3f", duration_multiplier)
+    multipliers[key] = {"signature": signature, "multiplier": duration_multiplier}
+    save_duration_multipliers()
+    return duration_multiplier
+
+def build_text_clip_infos(cues, text_clip, track_index, placements, duration_multiplier):
+    """
+    Build the AppendToTimeline clipInfo dicts for one lane of quantized cues up front
+
+    placements are the [index, start_frame, end_frame] entries of a lane
+    returned by quantize_cues. Returns (clip_infos, indices), two aligned
+    lists mapping each clipInfo back to its cue.
+    """
+    clip_infos = []
+    indices = []
+
+    for index, start_frame, end_frame in placements:
+        new_duration = int((end_frame - start_frame) * duration_multiplier + 0.999)
+        clip_infos.append({
             "mediaPoolItem": text_clip,
             "startFrame": 0,
-            "endFrame": duration - 1,
-            "trackIndex": track_count,
+            "endFrame": new_duration - 1,
+            "trackIndex": track_index,
             "recordFrame": start_frame
-        }
-        
-        base_duration = new_clip["endFrame"] - new_clip["startFrame"] + 1
-        new_duration = int(base_duration * duration_multiplier + 0.999)
-        new_clip["endFrame"] = new_duration - 1
-        timeline_items = media_pool.AppendToTimeline([new_clip])
-        
-        if timeline_items and len(timeline_items) > 0:
-            timeline_item = timeline_items[0]
-            
-            timeline_item.SetClipColor("Green")
+        })
+        indices.append(index)
 
-            if timeline_item.GetFusionCompCount() > 0:
-                comp = timeline_item.GetFusionCompByIndex(1)
-                if comp:
-                    text_tool = comp.FindToolByID("TextPlus")
-                    if text_tool:
-                        text_content = remove_ponctuation(row['text']) if remove_punctuation else row['text']
-                        text_content = apply_text_transform(text_content, text_transform)
-                        text_tool.SetInput("StyledText", text_content)
-                        created_clips.append(timeline_item)
-                        print(f"Created subtitle {row['id']}: {row['text'][:50]}{'...' if len(row['text']) > 50 else ''}")
-                    else:
-                        print(f"Warning: No TextPlus tool found in template for subtitle {row['id']}")
-            else:
-                print(f"Warning: No Fusion composition found for subtitle {row['id']}")
-        else:
-            print(f"Error: Failed to create timeline item for subtitle {row['id']}")
+    return clip_infos, indices
 
-    
-    print(f"Created {len(created_clips)} Text+ clips")
-    return True
+def append_clips_in_batches(media_pool, clip_infos, batch_size=APPEND_BATCH_SIZE, progress=None, cancel_event=None):
+    """
+    Append clipInfo dicts to the timeline with one AppendToTimeline call per batch
+
+    Returns a list aligned with clip_infos, holding the created TimelineItem
+    or None for clips Resolve refused to place (or that were never sent
+    because cancel_event was set).
+    """
+    timeline_items = [None] * len(clip_infos)
+    progress_log = ProgressLog("Inserting", len(clip_infos))
+
+    for batch_start in range(0, len(clip_infos), batch_size):
+        if cancel_event is not None and cancel_event.is_set():
+            break
+        if progress is not None:
+            progress("insert", batch_start, len(clip_infos))
+        progress_log.update(batch_start)
+
+        batch = clip_infos[batch_start:batch_start + batch_size]
+        items = media_pool.AppendToTimeline(batch) or []
+
+        if len(items) == len(batch):
+            timeline_items[batch_start:batch_start + len(batch)] = items
+            continue
+
+        # some clips were rejected, match the survivors back by track and
+        # record frame; clips sharing both are matched in batch order
+        indices_by_position = {}
+        for offset, info in enumerate(batch):
+            indices_by_position.setdefault((info["trackIndex"], info["recordFrame"]), []).append(batch_start + offset)
+        for item in items:
+            indices = indices_by_position.get((item.GetTrackTypeAndIndex()[1], item.GetStart()))
+            if indices:
+                timeline_items[indices.pop(0)] = item
+
+    if progress is not None and not (cancel_event is not None and cancel_event.is_set()):
+        progress("insert", len(clip_infos), len(clip_infos))
+
+    return timeline_items
+
+class TemplateRegistry:
+    """
+    Index of the Text+ templates (Fusion compositions) in the Media Pool
+
+    One traversal of the Media Pool maps every template name to its
+    MediaPoolItem and folder path. Templates are clips without a file path;
+    each clip costs a single GetClipProperty() call, which returns its file
+    path and name together.
+    Refreshes are serialized by lock, as the UI indexes from a worker thread.
+    """
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.root_id = None
+        self._templates = {}
+        self._entries = []
+
+    def refresh(self, media_pool):
+        """Re-index the Media Pool in a single traversal"""
+        with self.lock:
+            self._refresh(media_pool)
+
+    def _refresh(self, media_pool):
+        root_folder = media_pool.GetRootFolder()
+        templates = {}
+        entries = []
+
+        def search_folder(folder, folder_path=""):
+            for clip in folder.GetClipList() or []:
+                properties = clip.GetClipProperty() or {}
+                if properties.get("File Path", "") == "":
+                    clip_name = properties.get("Clip Name", "")
+                    templates.setdefault(clip_name, (clip, folder_path))
+                    entries.append((clip_name, folder_path))
+
+            for subfolder in folder.GetSubFolderList() or []:
+                subfolder_name = subfolder.GetName()
+                search_folder(subfolder, f"{folder_path}/{subfolder_name}" if folder_path else subfolder_name)
+
+        search_folder(root_folder)
+
+        self.root_id = root_folder.GetUniqueId()
+        self._templates = templates
+        self._entries = entries
+
+    def find(self, template_name):
+        """Return the first MediaPoolItem named template_name, or None"""
+        entry = self._templates.get(template_name)
+        return entry[0] if entry else None
+
+    def folder_path(self, template_name):
+        entry = self._templates.get(template_name)
+        return entry[1] if entry else None
+
+    def templates(self):
+        """Return (name, folder_path) for every template, in Media Pool order"""
+        return list(self._entries)
+
+    def caption_templates(self):
+        """Return the sorted names of the templates in the top-level "Captions Templates" folder"""
+        return sorted(name for name, folder_path in self._entries if folder_path == CAPTIONS_TEMPLATES_FOLDER)
+
+# shared Media Pool template index
+template_registry = TemplateRegistry()
+
+def get_template_registry(media_pool):
+    """Return the shared TemplateRegistry, indexing the Media Pool on first use or after a project change"""
+    with template_registry.lock:
+        if template_registry.root_id is None or template_registry.root_id != media_pool.GetRootFolder().GetUniqueId():
+            template_registry.refresh(media_pool)
+    return template_registry
+
+def refresh_template_registry():
+    template_registry.refresh(get_current_project().GetMediaPool())
+    return template_registry
 
 def find_text_plus_template_by_name(media_pool, template_name):
     """
     Find a specific Text+ template by name in the media pool
     Searches all folders for a matching template name
     """
-    root_folder = media_pool.GetRootFolder()
-    
-    def search_folder(folder):
-        clips = folder.GetClipList()
-        for clip in clips:
-            if clip.GetClipProperty("File Path") == "":
-                clip_name = clip.GetClipProperty("Clip Name")
-                if clip_name == template_name:
-                    return clip
-        
-        for subfolder in folder.GetSubFolderList():
-            result = search_folder(subfolder)
-            if result:
-                return result
-        return None
-    
-    return search_folder(root_folder)
+    registry = get_template_registry(media_pool)
+    clip = registry.find(template_name)
+    if clip is None:
+        # the template may have been added since the last traversal
+        registry.refresh(media_pool)
+        clip = registry.find(template_name)
+    return clip
 
 def list_available_templates(media_pool):
     """
     List all available Text+ templates (Fusion compositions) in the media pool
     """
-    root_folder = media_pool.GetRootFolder()
-    templates = []
-    
-    def search_folder(folder, folder_path=""):
-        clips = folder.GetClipList()
-        for clip in clips:
-            if clip.GetClipProperty("File Path") == "":
-                clip_name = clip.GetClipProperty("Clip Name")
-                templates.append(f"  - {clip_name} (in {folder_path or 'Root'})")
-        
-        for subfolder in folder.GetSubFolderList():
-            subfolder_name = subfolder.GetName()
-            new_path = f"{folder_path}/{subfolder_name}" if folder_path else subfolder_name
-            search_folder(subfolder, new_path)
-    
-    search_folder(root_folder)
-    
+    templates = get_template_registry(media_pool).templates()
+
     if templates:
-        for template in templates:
-            print(template)
+        logger.info("Available templates:\n%s", "\n".join(f"  - {clip_name} (in {folder_path or 'Root'})" for clip_name, folder_path in templates))
     else:
-        print("  No Text+ templates (Fusion compositions) found in Media Pool")
-        print("  Create a Text+ composition in Fusion and save it to the Media Pool")
+        logger.info("No Text+ templates (Fusion compositions) found in Media Pool. Create a Text+ composition in Fusion and save it to the Media Pool")
 
     # ------------------------------------------------------------
 
-def get_video_tracks():
-    global timeline
-    timeline = project.GetCurrentTimeline()
-    track_count = timeline.GetTrackCount("video")
-    return [timeline.GetTrackName("video", i) for i in range(1, track_count + 1)]
+def run_caption_jobs(timeline, track_jobs, remove_punctuation=True, text_transform="Keep Case", progress=None, cancel_event=None, project=None, overlap_policy="trim", text_rules=None, words_per_group=0):
+    """
+    Create one Text+ track per (srt_path, template_name) job, in order
 
-def get_available_templates():
-    """Get list of available Text+ templates from Media Pool"""
+    progress is called with a dict holding the current track number, the
+    track count, the phase ("parse", "insert" or "style"), the cues
+    done/total of the current track and the cues styled so far over all tracks.
+    The text rules are compiled once and shared by every track. When
+    words_per_group is set, cues are split into word groups first.
+    The jobs run as one transaction: if a track fails, the job is cancelled
+    or an exception is raised, every track and clip created so far is
+    removed again (see TimelineTransaction) and the timeline is left as it was.
+    Returns (tracks_done, status) with status "done", "failed" or
+    "cancelled"; tracks_done counts the tracks completed before a failure
+    or cancel, which have been rolled back. When Resolve refuses part of the
+    rollback, ROLLBACK_INCOMPLETE is appended to the status (and to the
+    message of a raised exception, re-raised as RuntimeError) since some
+    created clips or tracks are still on the timeline.
+    """
+    if not timeline:
+        logger.error("No timeline open")
+        return 0, "failed"
+    text_pipeline = TextTransformPipeline.from_options(remove_punctuation, text_transform, text_rules)
+    frame_rate = get_timeline_snapshot(timeline).rational_frame_rate
+    transaction = TimelineTransaction(timeline)
+
+    # parsing, splitting, quantization and text transforms of every track run
+    # on the pool while the tracks are inserted one after the other, in order
+    executor = ThreadPoolExecutor(max_workers=PREPARE_WORKERS, thread_name_prefix="OpenCaptionsPrepare")
+    futures = [executor.submit(prepare_caption_track, srt_path, frame_rate, text_pipeline, overlap_policy, words_per_group) for srt_path, _ in track_jobs]
     try:
-        media_pool = project.GetMediaPool()
-        root_folder = media_pool.GetRootFolder()
-        templates = []
-        
-        def search_folder(folder):
-            for subfolder in folder.GetSubFolderList():
-                if subfolder.GetName() == "Captions Templates":
-                    clips = subfolder.GetClipList()
-                    for clip in clips:
-                        if clip.GetClipProperty("File Path") == "":
-                            clip_name = clip.GetClipProperty("Clip Name")
-                            templates.append(clip_name)
-        
-        search_folder(root_folder)
+        tracks_done, status = _insert_prepared_tracks(timeline, track_jobs, futures, progress, cancel_event, project, transaction)
+    except Exception as e:
+        if not transaction.rollback():
+            raise RuntimeError(f"{e}{ROLLBACK_INCOMPLETE}") from e
+        raise
+    except BaseException:
+        transaction.rollback()
+        raise
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+    if status != "done" and not transaction.rollback():
+        status += ROLLBACK_INCOMPLETE
+    return tracks_done, status
+
+def validate_prepared_track(prepared):
+    """Return the problems that would make inserting a PreparedTrack fail or create broken clips"""
+    cues = prepared.cues
+    problems = []
+    if not prepared.lanes[0]:
+        problems.append("No cue with a valid duration")
+    backwards = [cues.ids[index] for index in range(len(cues)) if cues.ids[index] != 0 and cues.end_ms[index] <= cues.start_ms[index]]
+    if backwards:
+        problems.append(f"{len(backwards)} cues do not end after they start (ids {summarize_ids(backwards)})")
+    placements = [placement for lane in prepared.lanes for placement in lane]
+    empty = [cues.ids[placement[0]] for placement, text in zip(placements, prepared.texts) if not text.strip()]
+    if empty:
+        problems.append(f"{len(empty)} cues are empty after the text rules (ids {summarize_ids(empty)})")
+    return problems
+
+def validate_caption_jobs(timeline, track_jobs, remove_punctuation=True, text_transform="Keep Case", project=None, overlap_policy="trim", text_rules=None, words_per_group=0):
+    """
+    Dry run of run_caption_jobs: check every job without touching the timeline
+
+    Every subtitle file is parsed and prepared exactly as for insertion and
+    every template is looked up in the Media Pool. Returns one dict per job
+    with the srt path and template, the cue, clip and track counts, and the
+    list of problems found (empty when the job would run).
+    """
+    text_pipeline = TextTransformPipeline.from_options(remove_punctuation, text_transform, text_rules)
+    frame_rate = get_timeline_snapshot(timeline).rational_frame_rate
+    if project is None:
+        project = get_current_project()
+    media_pool = project.GetMediaPool()
+
+    results = []
+    with ThreadPoolExecutor(max_workers=PREPARE_WORKERS, thread_name_prefix="OpenCaptionsPrepare") as executor:
+        futures = [executor.submit(prepare_caption_track, srt_path, frame_rate, text_pipeline, overlap_policy, words_per_group) for srt_path, _ in track_jobs]
+        for (srt_path, template_name), future in zip(track_jobs, futures):
+            result = {"srt": srt_path, "template": template_name, "cues": 0, "clips": 0, "tracks": 0, "problems": []}
+            if template_name is not None and not find_text_plus_template_by_name(media_pool, template_name):
+                result["problems"].append(f"Text+ template '{template_name}' not found in Media Pool")
+            try:
+                prepared = future.result()
+            except Exception as e:
+                result["problems"].append(f"Could not read {os.path.basename(srt_path)}: {e}")
+            else:
+                result["problems"].extend(validate_prepared_track(prepared))
+                result.update(cues=len(prepared.cues), clips=len(prepared.texts), tracks=len(prepared.lanes))
+            for problem in result["problems"]:
+                logger.warning("%s: %s", os.path.basename(srt_path), problem)
+            results.append(result)
+    return results
+
+def _insert_prepared_tracks(timeline, track_jobs, futures, progress, cancel_event, project, transaction):
+    cues_done = 0
+
+    for track_number, ((srt_path, template_name), future) in enumerate(zip(track_jobs, futures), start=1):
+        if cancel_event is not None and cancel_event.is_set():
+            return track_number - 1, "cancelled"
+
+        def report(phase, done, total):
+            if progress is not None:
+                styled = done if phase == "style" else 0
+                progress({"track": track_number, "tracks": len(track_jobs), "phase": phase, "done": done, "total": total, "cues_done": cues_done + styled})
+
+        report("parse", 0, 0)
+        prepared = future.result()
+        logger.info("Track %d/%d: creating Text+ clips from %s (%d cues) using template: %s", track_number, len(track_jobs), srt_path, len(prepared.cues), template_name)
+        success = insert_prepared_track(
+            prepared,
+            timeline,
+            template_name,
+            project=project,
+            progress=report,
+            cancel_event=cancel_event,
+            transaction=transaction,
+        )
+        if not success:
+            if cancel_event is not None and cancel_event.is_set():
+                return track_number - 1, "cancelled"
+            return track_number - 1, "failed"
+        cues_done += len(prepared.texts)
+
+    return len(track_jobs), "done"
+
+class JobRunner:
+    """
+    Run a job on a worker thread and marshal its progress back to the Tk main loop
 
-        templates.sort()
+    The job is called as job(report, cancel_event, *args); report() may be
+    called from the worker thread. Messages are queued and delivered on the
+    main thread by polling with root.after, only the latest progress message
+    of each poll is forwarded to on_progress.
+    """
+
+    def __init__(self, root, on_progress, on_done, poll_interval_ms=100):
+        self.root = root
+        self.on_progress = on_progress
+        self.on_done = on_done
+        self.poll_interval_ms = poll_interval_ms
+        self.cancel_event = threading.Event()
+        self._queue = queue.Queue()
+        self._thread = None
+        self._on_done = on_done
+
+    @property
+    def running(self):
+        return self._thread is not None
+
+    def start(self, job, *args, on_done=None):
+        """Start job on the worker thread; on_done replaces the runner's handler for this job"""
+        if self.running:
+            return False
+        self.cancel_event.clear()
+        self._on_done = on_done or self.on_done
+
+        def work():
+            try:
+                result = job(self.report, self.cancel_event, *args)
+            except Exception as e:
+                self._queue.put(("error", e))
+            else:
+                self._queue.put(("done", result))
+
+        self._thread = threading.Thread(target=work, name="OpenCaptionsJob", daemon=True)
+        self._thread.start()
+        self.root.after(self.poll_interval_ms, self._poll)
+        return True
+
+    def report(self, payload):
+        self._queue.put(("progress", payload))
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def _poll(self):
+        latest_progress = None
+        finished = None
+        while True:
+            try:
+                kind, payload = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if kind == "progress":
+                latest_progress = payload
+            else:
+                finished = (kind, payload)
+
+        if latest_progress is not None:
+            self.on_progress(latest_progress)
+        if finished is not None:
+            self._thread = None
+            self._on_done(*finished)
+        else:
+            self.root.after(self.poll_interval_ms, self._poll)
+
+def get_video_tracks():
+    timeline = get_current_project().GetCurrentTimeline()
+    if not timeline:
+        return []
+    return list(get_timeline_snapshot(timeline).track_names)
 
-        return templates
+def get_available_templates(refresh=False):
+    """
+    Get list of available Text+ templates from Media Pool
+    The shared registry is reused unless refresh is set or the project changed.
+    """
+    try:
+        if refresh:
+            return refresh_template_registry().caption_templates()
+        return get_template_registry(get_current_project().GetMediaPool()).caption_templates()
     except Exception as e:
-        print(f"Error getting templates: {e}")
+        logger.error("Error getting templates: %s", e)
         return []
 
+def is_whisper_json(file_path):
+    """Tell whether a JSON file has the layout read_whisper_json accepts"""
+    try:
+        with open(file_path, 'rb') as file:
+            document = json.load(file)
+    except (OSError, ValueError):
+        return False
+    if isinstance(document, dict):
+        segments = document.get('segments', document.get('transcription'))
+    else:
+        segments = document
+    if not isinstance(segments, list):
+        return False
+    if not segments:
+        return True
+    segment = segments[0]
+    return isinstance(segment, dict) and ('offsets' in segment or ('start' in segment and 'end' in segment))
+
+def pair_subtitle_files(folder_path, templates):
+    """
+    Pair the subtitle files of a folder with templates by naming convention
+
+    "title.fr.srt" goes with the "fr" template: the dotted parts of the file
+    name are tried from the last one back, then the whole name without its
+    extension ("fr.srt"), matching template names case-insensitively.
+    Returns (pairs, unmatched): the (path, template) pairs sorted by file name,
+    and the names of the subtitle files no template matched. JSON files that
+    are not Whisper transcripts are skipped.
+    """
+    templates_by_key = {template.lower(): template for template in templates}
+    pairs = []
+    unmatched = []
+    for file_name in sorted(os.listdir(folder_path), key=str.lower):
+        stem, extension = os.path.splitext(file_name)
+        path = os.path.join(folder_path, file_name)
+        if extension.lower() not in SUBTITLE_EXTENSIONS or not os.path.isfile(path):
+            continue
+        if extension.lower() == ".json" and not is_whisper_json(path):
+            continue
+        parts = stem.split(".")
+        candidates = [parts[index] for index in range(len(parts) - 1, 0, -1)] + [stem]
+        template = next((templates_by_key[candidate.lower()] for candidate in candidates if candidate.lower() in templates_by_key), None)
+        if template is None:
+            unmatched.append(file_name)
+        else:
+            pairs.append((path, template))
+    return pairs, unmatched
+
+# ------------------------- headless batch functions -------------------------
+
+def load_manifest(manifest_path):
+    """
+    Load a batch job manifest (.json, or .toml on Python 3.11+)
+
+    The manifest holds a "jobs" list and optional "defaults" applied to every
+    job. Each job names a project, timeline, srt file and template, plus the
+    remove_punctuation/text_transform/overlap_policy options and text rules
+    given inline ("text_rules") or as a rules file ("text_rules_file", see
+    load_text_rules). A job with "mode": "sync" re-syncs the existing track
+    named by "track" instead of creating a new one (see sync_track_from_cues).
+    Relative paths are resolved against the manifest's folder.
+    """
+    if manifest_path.lower().endswith(".toml"):
+        if tomllib is None:
+            raise ValueError("TOML manifests need Python 3.11+, use a JSON manifest instead")
+        with open(manifest_path, 'rb') as file:
+            manifest = tomllib.load(file)
+    else:
+        with open(manifest_path, 'r', encoding='utf-8-sig') as file:
+            manifest = json.load(file)
+
+    defaults = manifest.get("defaults", {})
+    base_dir = os.path.dirname(os.path.abspath(manifest_path))
+    jobs = []
+    for index, job in enumerate(manifest.get("jobs", []), start=1):
+        job = {**defaults, **job}
+        required = ("timeline", "srt", "track") if job.get("mode") == "sync" else ("timeline", "srt", "template")
+        for key in required:
+            if not job.get(key):
+                raise ValueError(f"Job {index} is missing '{key}'")
+        job["srt"] = os.path.join(base_dir, os.path.expanduser(job["srt"]))
+        if job.get("text_rules_file"):
+            job["text_rules_file"] = os.path.join(base_dir, os.path.expanduser(job["text_rules_file"]))
+        jobs.append(job)
+    return manifest, jobs
+
+def find_timeline_by_name(project, timeline_name):
+    for index in range(1, project.GetTimelineCount() + 1):
+        timeline = project.GetTimelineByIndex(index)
+        if timeline and timeline.GetName() == timeline_name:
+            return timeline
+    return None
+
+def run_manifest(manifest_path, report_path=None, dry_run=None):
+    """
+    Run every job of a manifest back to back over a single Resolve connection
+
+    Jobs are processed in manifest order; a project is only loaded when it
+    differs from the previous job's and is saved before switching away and
+    at the end (unless the manifest sets "save_projects" to false).
+    With dry_run (default: the manifest's "dry_run"), every job is only
+    validated (see validate_caption_jobs) and nothing is modified or saved.
+    The report is written as JSON to report_path, or printed when omitted.
+    Returns the report dict.
+    """
+    manifest, jobs = load_manifest(manifest_path)
+    if dry_run is None:
+        dry_run = manifest.get("dry_run", False)
+    save_projects = manifest.get("save_projects", True) and not dry_run
+    project_manager = get_resolve().GetProjectManager()
+    project = project_manager.GetCurrentProject()
+    results = []
+
+    for index, job in enumerate(jobs, start=1):
+        started = time.perf_counter()
+        result = {"job": index, "project": job.get("project"), "timeline": job["timeline"], "srt": job["srt"], "template": job.get("template"), "cues": 0}
+        try:
+            if job.get("project") and (project is None or job["project"] != project.GetName()):
+                if save_projects and project:
+                    project_manager.SaveProject()
+                loaded_project = project_manager.LoadProject(job["project"])
+                if not loaded_project:
+                    # keep working with whatever project Resolve still has open
+                    project = project_manager.GetCurrentProject()
+                    raise RuntimeError(f"Could not load project '{job['project']}'")
+                project = loaded_project
+            if not project:
+                raise RuntimeError("No project open in Resolve; name one with the job's \"project\" key")
+
+            timeline = find_timeline_by_name(project, job["timeline"])
+            if timeline is None:
+                raise RuntimeError(f"Timeline '{job['timeline']}' not found")
+
+            text_rules = load_text_rules(job["text_rules_file"]) if job.get("text_rules_file") else {}
+            text_rules.update(check_text_rules(job.get("text_rules", {})))
+
+            if dry_run:
+                invalidate_timeline_snapshot(timeline)
+                validation = validate_caption_jobs(
+                    timeline,
+                    [(job["srt"], job.get("template"))],
+                    remove_punctuation=job.get("remove_punctuation", True),
+                    text_transform=job.get("text_transform", "Keep Case"),
+                    project=project,
+                    overlap_policy=job.get("overlap_policy", "trim"),
+                    text_rules=text_rules,
+                    words_per_group=job.get("words_per_group", 0),
+                )[0]
+                if job.get("mode") == "sync" and get_timeline_snapshot(timeline).track_index(job["track"]) is None:
+                    validation["problems"].append(f"Track '{job['track']}' not found")
+                result["cues"] = validation["cues"]
+                result["problems"] = validation["problems"]
+                result["status"] = "invalid" if validation["problems"] else "ok"
+            else:
+                project.SetCurrentTimeline(timeline)
+                text_pipeline = TextTransformPipeline.from_options(job.get("remove_punctuation", True), job.get("text_transform", "Keep Case"), text_rules)
+
+                df = read_subtitles(job["srt"])
+                if job.get("words_per_group"):
+                    df = split_cues_into_words(df, job["words_per_group"])
+                result["cues"] = len(df)
+
+                if job.get("mode") == "sync":
+                    invalidate_timeline_snapshot(timeline)
+                    sync_result = sync_track_from_cues(
+                        timeline,
+                        job.get("track", ""),
+                        df,
+                        template_name=job.get("template"),
+                        project=project,
+                        text_pipeline=text_pipeline,
+                        overlap_policy=job.get("overlap_policy", "trim"),
+                    )
+                    result["status"] = "ok" if sync_result is not None else "failed"
+                    result["sync"] = sync_result
+                else:
+                    success = df2NewtimelineText(
+                        df,
+                        timeline,
+                        job["template"],
+                        project=project,
+                        overlap_policy=job.get("overlap_policy", "trim"),
+                        text_pipeline=text_pipeline,
+                    )
+                    result["status"] = "ok" if success else "failed"
+        except Exception as e:
+            result["status"] = "error"
+            result["error"] = str(e)
+        result["seconds"] = round(time.perf_counter() - started, 3)
+        log_level = logging.INFO if result["status"] == "ok" else logging.ERROR
+        detail = result.get("error") or "; ".join(result.get("problems", []))
+        logger.log(log_level, "Job %d/%d: %s (%s, %s)%s", index, len(jobs), result["status"], result["timeline"], os.path.basename(result["srt"]), f": {detail}" if detail else "")
+        results.append(result)
+
+    if save_projects and project:
+        project_manager.SaveProject()
+    finish_profiling("batch")
+
+    report = {
+        "manifest": os.path.abspath(manifest_path),
+        "dry_run": bool(dry_run),
+        "jobs": results,
+        "succeeded": sum(1 for result in results if result["status"] == "ok"),
+        "failed": sum(1 for result in results if result["status"] != "ok"),
+    }
+    if report_path:
+        with open(report_path, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+    return report
+
+def cli(argv):
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="OpenCaptions", description="Create Text+ caption tracks without the UI.")
+    parser.add_argument("--manifest", required=True, help="JSON or TOML job manifest")
+    parser.add_argument("--report", help="write the JSON report to this file instead of stdout")
+    parser.add_argument("--profile", action="store_true", help="profile Resolve API calls, the trace is written to PROFILE_DIR")
+    parser.add_argument("--dry-run", action="store_true", default=None, help="only validate the jobs, without modifying any timeline")
+    parser.add_argument("--log-level", help="DEBUG, INFO, WARNING or ERROR (default: $OPENCAPTIONS_LOG_LEVEL or INFO)")
+    parser.add_argument("--log-file", help="also write the log to this file (default: $OPENCAPTIONS_LOG_FILE)")
+    args = parser.parse_args(argv)
+
+    try:
+        configure_logging(args.log_level, args.log_file)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+
+    if args.profile:
+        enable_profiling()
+    report = run_manifest(args.manifest, args.report, dry_run=args.dry_run)
+    return 0 if report["failed"] == 0 else 1
+
 def main():
+    import tkinter as tk
+    from tkinter import ttk, filedialog, messagebox
+
+    try:
+        configure_logging()
+    except (OSError, ValueError) as e:
+        configure_logging("INFO", "")
+        logger.warning("Logging falls back to the console at INFO: %s", e)
+
     root = tk.Tk()
     root.focus_force()
     root.title("OpenCaptions")
-    root.geometry("720x540")
-    root.minsize(720, 540)
+    root.geometry("720x760")
+    root.minsize(720, 760)
 
     status_var = tk.StringVar()
     remove_punctuation_var = tk.BooleanVar(value=True)
-    text_transform_options = ["Keep Case", "Lowercase", "Uppercase", "Capitalize All Words"]
+    text_transform_options = list(CASE_TRANSFORMS)
     text_transform_var = tk.StringVar(value=text_transform_options[0])
+    punctuation_var = tk.StringVar(value=DEFAULT_PUNCTUATION)
+    max_chars_var = tk.IntVar(value=0)
+    words_per_group_var = tk.IntVar(value=0)
+    text_rules_var = tk.StringVar()
+    overlap_policy_var = tk.StringVar(value=OVERLAP_POLICIES[0])
+    export_track_var = tk.StringVar()
+    profile_var = tk.BooleanVar(value=_profiler is not None)
+    dry_run_var = tk.BooleanVar(value=False)
 
     style = ttk.Style(root)
     style.configure("Delete.TButton", foreground="red")
 
-    templates = get_available_templates()
-    track_entries = []
-    add_button = None
+    # filled in by load_templates once the Media Pool has been indexed
+    templates = []
+    # track list rows by Treeview item id, in display order; rows are only
+    # ever appended or deleted, so both stay constant-time
+    track_entries = {}
+    editor_template_var = tk.StringVar()
+    editor_srt_var = tk.StringVar()
+    editor_loading = False
+
+    def set_track_entry(iid, template=None, srt=None):
+        entry = track_entries[iid]
+        if template is not None:
+            entry["template"] = template
+            tracks_tree.set(iid, "template", template)
+        if srt is not None:
+            entry["srt"] = srt
+            tracks_tree.set(iid, "file", os.path.basename(srt))
+            tracks_tree.set(iid, "folder", os.path.dirname(srt))
+
+    def add_track_entry(srt="", template=None):
+        if template is None:
+            template = templates[0] if templates else ""
+        iid = tracks_tree.insert("", "end", values=(template, os.path.basename(srt), os.path.dirname(srt)))
+        track_entries[iid] = {"template": template, "srt": srt}
+        return iid
 
-    def select_srt_file(entry):
-        if entry not in track_entries:
+    def show_track_entry(iid):
+        # rows are not numbered, so a message about one selects and reveals
+        # it; returns the row's file name, or "" once the row was removed
+        if not tracks_tree.exists(iid):
+            return ""
+        tracks_tree.selection_set(iid)
+        tracks_tree.see(iid)
+        return os.path.basename(track_entries[iid]["srt"])
+
+    def add_track_callback():
+        iid = add_track_entry()
+        tracks_tree.selection_set(iid)
+        tracks_tree.see(iid)
+        select_srt_file()
+
+    def remove_track_entries():
+        selection = tracks_tree.selection()
+        if not selection:
+            status_var.set("Select the tracks to remove.")
+            return
+        tracks_tree.delete(*selection)
+        for iid in selection:
+            del track_entries[iid]
+        status_var.set(f"Removed {len(selection)} tracks.")
+
+    def select_srt_file():
+        selection = tracks_tree.selection()
+        if len(selection) != 1:
             return
-        path = filedialog.askopenfilename(title="Select SRT File", filetypes=[("SRT files", "*.srt"), ("All files", "*.*")])
+        path = filedialog.askopenfilename(title="Select Subtitle File", filetypes=SUBTITLE_FILE_TYPES)
         if path:
-            entry["srt_var"].set(path)
+            editor_srt_var.set(path)
 
-    def remove_track_entry(entry):
-        nonlocal add_button
-        if entry not in track_entries:
+    def import_folder():
+        folder = filedialog.askdirectory(title="Select Subtitle Folder")
+        if not folder:
             return
-        for widget in (entry["label"], entry["template_combo"], entry["srt_entry"], entry["select_button"], entry["delete_button"]):
-            widget.destroy()
-        track_entries.remove(entry)
-        for index, entry_item in enumerate(track_entries):
-            entry_item["label"].configure(text=f"Track {index + 1}")
-            entry_item["label"].grid_configure(row=index + 1)
-            entry_item["template_combo"].grid_configure(row=index + 1)
-            entry_item["srt_entry"].grid_configure(row=index + 1)
-            entry_item["select_button"].grid_configure(row=index + 1)
-            entry_item["delete_button"].grid_configure(row=index + 1)
-        if add_button is not None:
-            add_button.state(["!disabled"])
-        status_var.set("Removed track.")
-
-    def add_track_entry():
-        nonlocal add_button
-        if len(track_entries) >= 6:
-            status_var.set("Maximum of 6 tracks.")
-            if add_button is not None:
-                add_button.state(["disabled"])
+        try:
+            pairs, unmatched = pair_subtitle_files(folder, templates)
+        except OSError as e:
+            status_var.set(f"Could not read folder: {e}")
             return
-        index = len(track_entries)
-        template_var = tk.StringVar(value=templates[0] if templates else "")
-        srt_var = tk.StringVar()
-        entry = {
-            "template_var": template_var,
-            "srt_var": srt_var,
-        }
-        label = ttk.Label(tracks_frame, text=f"Track {index + 1}")
-        label.grid(row=index + 1, column=0, sticky="w", pady=(4, 0))
-        entry["label"] = label
-        template_combo = ttk.Combobox(tracks_frame, textvariable=template_var, values=templates, state="readonly")
-        template_combo.grid(row=index + 1, column=1, sticky="ew", pady=(4, 0))
-        entry["template_combo"] = template_combo
-        srt_entry = ttk.Entry(tracks_frame, textvariable=srt_var)
-        srt_entry.grid(row=index + 1, column=2, sticky="ew", pady=(4, 0))
-        entry["srt_entry"] = srt_entry
-        select_button = ttk.Button(tracks_frame, text="Select", command=lambda e=entry: select_srt_file(e))
-        select_button.grid(row=index + 1, column=3, sticky="w", pady=(4, 0))
-        entry["select_button"] = select_button
-        delete_button = ttk.Button(tracks_frame, text="X", width=1, style="Delete.TButton", command=lambda e=entry: remove_track_entry(e))
-        delete_button.grid(row=index + 1, column=4, sticky="w", pady=(4, 0))
-        entry["delete_button"] = delete_button
-        track_entries.append(entry)
-        if len(track_entries) == 6 and add_button is not None:
-            add_button.state(["disabled"])
-
-    def refresh_templates():
+        for path, template in pairs:
+            add_track_entry(path, template)
+        message = f"Imported {len(pairs)} tracks."
+        if unmatched:
+            message += f" {len(unmatched)} files without a matching template: {', '.join(unmatched[:5])}{'...' if len(unmatched) > 5 else ''}"
+        status_var.set(message)
+
+    def on_track_selected(event=None):
+        nonlocal editor_loading
+        selection = tracks_tree.selection()
+        editor_loading = True
+        try:
+            if selection:
+                entry = track_entries[selection[0]]
+                editor_template_var.set(entry["template"])
+                editor_srt_var.set(entry["srt"] if len(selection) == 1 else "")
+            else:
+                editor_template_var.set("")
+                editor_srt_var.set("")
+        finally:
+            editor_loading = False
+        editor_srt_entry.state(["!disabled"] if len(selection) == 1 else ["disabled"])
+        editor_select_button.state(["!disabled"] if len(selection) == 1 else ["disabled"])
+
+    def on_editor_template_changed(*args):
+        # a template picked in the editor applies to every selected track
+        if editor_loading:
+            return
+        for iid in tracks_tree.selection():
+            set_track_entry(iid, template=editor_template_var.get())
+
+    def on_editor_srt_changed(*args):
+        selection = tracks_tree.selection()
+        if editor_loading or len(selection) != 1:
+            return
+        set_track_entry(selection[0], srt=editor_srt_var.get())
+
+    def load_templates(refresh=False):
+        # connecting to Resolve and indexing the Media Pool can take seconds,
+        # so both run on a worker thread and on_templates_loaded fills the
+        # comboboxes once they are done. The registry is queried directly,
+        # not through get_available_templates, so that an error reaches
+        # on_templates_loaded instead of looking like an empty Media Pool
+        def fetch_templates(report, cancel_event):
+            if refresh:
+                return refresh_template_registry().caption_templates()
+            return get_template_registry(get_current_project().GetMediaPool()).caption_templates()
+
+        if template_runner.start(fetch_templates):
+            status_var.set("Loading templates...")
+
+    def on_templates_loaded(kind, result):
         nonlocal templates
-        templates = get_available_templates()
+        if kind == "error":
+            status_var.set(f"Error getting templates: {result}")
+            return
+        templates = result
+        import_folder_button.state(["!disabled"])
         if templates:
             status_var.set(f"Found {len(templates)} templates")
         else:
             status_var.set("No Text+ templates found in Media Pool")
-        for entry in track_entries:
-            entry["template_combo"]["values"] = templates
-            if templates:
-                if entry["template_var"].get() not in templates:
-                    entry["template_var"].set(templates[0])
+        editor_template_combo["values"] = templates
+        for iid, entry in track_entries.items():
+            if entry["template"] not in templates:
+                set_track_entry(iid, template=templates[0] if templates else "")
+        on_track_selected()
+
+    def refresh_export_tracks():
+        timeline = get_current_project().GetCurrentTimeline()
+        if not timeline:
+            status_var.set("No timeline open.")
+        invalidate_timeline_snapshot(timeline)
+        track_names = get_video_tracks()
+        export_track_combo["values"] = track_names
+        if export_track_var.get() not in track_names:
+            export_track_var.set(track_names[-1] if track_names else "")
+
+    def export_callback():
+        track_name = export_track_var.get()
+        if not track_name:
+            status_var.set("Select a track to export.")
+            return
+        path = filedialog.asksaveasfilename(
+            title="Export Subtitles",
+            defaultextension=".srt",
+            filetypes=[("SRT files", "*.srt"), ("WebVTT files", "*.vtt")],
+        )
+        if not path:
+            return
+        timeline = get_current_project().GetCurrentTimeline()
+        if not timeline:
+            status_var.set("No timeline open.")
+            return
+        try:
+            written = export_track_to_subtitles(timeline, track_name, path)
+        except OSError as e:
+            status_var.set(f"Export failed: {e}")
+            return
+        status_var.set(f"Exported {written} cues from {track_name}.")
+
+    def sync_callback():
+        track_name = export_track_var.get()
+        if job_runner.running:
+            return
+        if not track_name:
+            status_var.set("Select a track to sync.")
+            return
+        path = filedialog.askopenfilename(title="Select Edited Subtitle File", filetypes=SUBTITLE_FILE_TYPES)
+        if not path:
+            return
+        project = get_current_project()
+        timeline = project.GetCurrentTimeline()
+        if not timeline:
+            status_var.set("No timeline open.")
+            return
+        invalidate_timeline_snapshot(timeline)
+        try:
+            text_pipeline = TextTransformPipeline.from_options(remove_punctuation_var.get(), text_transform_var.get(), build_text_rules())
+        except (OSError, ValueError, tk.TclError) as e:
+            status_var.set(f"Invalid text rules: {e}")
+            return
+        overlap_policy = overlap_policy_var.get()
+
+        def sync_job(report, cancel_event):
+            try:
+                return sync_track_from_cues(timeline, track_name, read_subtitles(path), project=project, text_pipeline=text_pipeline, overlap_policy=overlap_policy, cancel_event=cancel_event)
+            finally:
+                finish_profiling("sync")
+
+        def on_sync_done(kind, result):
+            execute_button.state(["!disabled"])
+            cancel_button.state(["disabled"])
+            if kind == "error":
+                status_var.set(f"Error: {result}")
+            elif result is None and job_runner.cancel_event.is_set():
+                status_var.set(f"Sync of {track_name} cancelled, the track was left unchanged.")
+            elif result is None:
+                status_var.set(f"Failed to sync {track_name}, see the console.")
             else:
-                entry["template_var"].set("")
+                status_var.set(f"Synced {track_name}: {result['updated']} updated, {result['deleted']} deleted, {result['inserted']} inserted, {result['unchanged']} unchanged.")
+
+        execute_button.state(["disabled"])
+        cancel_button.state(["!disabled"])
+        status_var.set(f"Syncing {track_name}...")
+        job_runner.start(sync_job, on_done=on_sync_done)
+
+    def on_job_progress(payload):
+        track_progress["maximum"] = payload["tracks"]
+        track_progress["value"] = payload["track"] - 1
+        cue_progress["maximum"] = max(payload["total"], 1)
+        cue_progress["value"] = payload["done"]
+        elapsed = time.monotonic() - job_started
+        rate = payload["cues_done"] / elapsed if elapsed > 0 else 0.0
+        phase_labels = {"parse": "Parsing", "insert": "Inserting", "style": "Styling"}
+        status_var.set(f"Track {payload['track']}/{payload['tracks']}: {phase_labels[payload['phase']]} {payload['done']}/{payload['total']} ({rate:.0f} cues/s)")
+
+    def on_job_done(kind, result):
+        execute_button.state(["!disabled"])
+        cancel_button.state(["disabled"])
+        if kind == "error":
+            status_var.set(f"Error: {result}")
+            return
+        created, job_status = result
+        track_progress["value"] = created
+        if job_status.endswith(ROLLBACK_INCOMPLETE):
+            job_status = job_status[:-len(ROLLBACK_INCOMPLETE)]
+            outcome = "some created clips or tracks could not be removed, check the timeline"
+        else:
+            outcome = "the timeline was left unchanged"
+        if job_status == "cancelled":
+            status_var.set(f"Cancelled, {outcome}.")
+        elif job_status == "failed":
+            file_name = show_track_entry(job_iids[created]) if created < len(job_iids) else ""
+            track_label = f"{file_name} (selected)" if file_name else f"row {created + 1}"
+            status_var.set(f"Failed to create the track of {track_label}, {outcome}.")
+        else:
+            status_var.set(f"Created {created} Text+ tracks.")
+
+    def on_dry_run_done(kind, result):
+        execute_button.state(["!disabled"])
+        cancel_button.state(["disabled"])
+        if kind == "error":
+            status_var.set(f"Error: {result}")
+            return
+        invalid = [(iid, track) for iid, track in zip(job_iids, result) if track["problems"]]
+        if invalid:
+            iid, track = invalid[0]
+            selected = " (selected)" if show_track_entry(iid) else ""
+            more = f" ({len(invalid) - 1} more tracks with problems, see the console)" if len(invalid) > 1 else ""
+            status_var.set(f"Dry run: {os.path.basename(track['srt'])}{selected}: {'; '.join(track['problems'])}{more}")
+        else:
+            clips = sum(track["clips"] for track in result)
+            status_var.set(f"Dry run: all {len(result)} tracks are valid ({clips} clips).")
+
+    job_runner = JobRunner(root, on_job_progress, on_job_done)
+    job_started = 0.0
+    # tree rows of the tracks of the running job, in job order
+    job_iids = []
 
     def execute_callback():
+        nonlocal job_started, job_iids
+        if job_runner.running:
+            return
         if not track_entries:
             status_var.set("Add at least one track.")
             return
-        for index, entry in enumerate(track_entries, start=1):
-            if not entry["srt_var"].get() or not entry["template_var"].get():
-                status_var.set(f"Track {index} is missing an SRT file or template.")
+        for iid, entry in track_entries.items():
+            if not entry["srt"] or not entry["template"]:
+                show_track_entry(iid)
+                status_var.set("The selected track is missing a subtitle file or template.")
                 return
-        global timeline
+        project = get_current_project()
         timeline = project.GetCurrentTimeline()
-        for index, entry in enumerate(track_entries, start=1):
-            df = srt2df(entry["srt_var"].get())
-            success = df2NewtimelineText(
-                df,
-                timeline,
-                entry["template_var"].get(),
-                remove_punctuation=remove_punctuation_var.get(),
-                text_transform=text_transform_var.get(),
+        if not timeline:
+            status_var.set("No timeline open.")
+            return
+        invalidate_timeline_snapshot(timeline)
+        job_iids = list(track_entries)
+        track_jobs = [(entry["srt"], entry["template"]) for entry in track_entries.values()]
+        remove_punctuation = remove_punctuation_var.get()
+        text_transform = text_transform_var.get()
+        overlap_policy = overlap_policy_var.get()
+        try:
+            text_rules = build_text_rules()
+        except (OSError, ValueError, tk.TclError) as e:
+            status_var.set(f"Invalid text rules: {e}")
+            return
+        try:
+            words_per_group = max(words_per_group_var.get(), 0)
+        except tk.TclError:
+            status_var.set("Words per caption must be a number.")
+            return
+        job_started = time.monotonic()
+        track_progress["value"] = 0
+        cue_progress["value"] = 0
+        execute_button.state(["disabled"])
+        cancel_button.state(["!disabled"])
+
+        if dry_run_var.get():
+            status_var.set("Validating...")
+            job_runner.start(
+                lambda report, cancel_event: validate_caption_jobs(
+                    timeline,
+                    track_jobs,
+                    remove_punctuation=remove_punctuation,
+                    text_transform=text_transform,
+                    project=project,
+                    overlap_policy=overlap_policy,
+                    text_rules=text_rules,
+                    words_per_group=words_per_group,
+                ),
+                on_done=on_dry_run_done,
             )
-            if not success:
-                status_var.set(f"Failed to create track {index}.")
-                return
-        status_var.set(f"Created {len(track_entries)} Text+ tracks.")
+            return
+
+        def execute_job(report, cancel_event):
+            try:
+                return run_caption_jobs(
+                    timeline,
+                    track_jobs,
+                    remove_punctuation=remove_punctuation,
+                    text_transform=text_transform,
+                    progress=report,
+                    cancel_event=cancel_event,
+                    project=project,
+                    overlap_policy=overlap_policy,
+                    text_rules=text_rules,
+                    words_per_group=words_per_group,
+                )
+            finally:
+                finish_profiling("execute")
+
+        job_runner.start(execute_job)
+
+    def select_text_rules_file():
+        path = filedialog.askopenfilename(title="Select Text Rules File", filetypes=[("JSON files", "*.json"), ("All files", "*.*")])
+        if path:
+            text_rules_var.set(path)
+
+    def build_text_rules():
+        # the rules file, with the punctuation and line length fields on top;
+        # the punctuation field only wins once it is changed from its default
+        text_rules = load_text_rules(text_rules_var.get()) if text_rules_var.get() else {}
+        if punctuation_var.get() != DEFAULT_PUNCTUATION or "punctuation" not in text_rules:
+            text_rules["punctuation"] = punctuation_var.get()
+        if max_chars_var.get() > 0:
+            text_rules["max_chars_per_line"] = max_chars_var.get()
+        return text_rules
+
+    def toggle_profiling():
+        if profile_var.get():
+            enable_profiling()
+        else:
+            disable_profiling()
+
+    def cancel_callback():
+        job_runner.cancel()
+        cancel_button.state(["disabled"])
+        status_var.set("Cancelling...")
 
     content = ttk.Frame(root, padding=24)
     content.grid(row=0, column=0, sticky="nsew")
@@ -465,46 +2714,120 @@ def main():
 
     tracks_frame = ttk.Frame(tracks_section)
     tracks_frame.grid(row=0, column=0, columnspan=5, sticky="nsew")
-    tracks_frame.columnconfigure(1, weight=1)
-    tracks_frame.columnconfigure(2, weight=1)
+    tracks_frame.columnconfigure(0, weight=1)
+    tracks_frame.rowconfigure(0, weight=1)
+
+    tracks_tree = ttk.Treeview(tracks_frame, columns=("template", "file", "folder"), show="headings", selectmode="extended", height=6)
+    tracks_tree.heading("template", text="Template")
+    tracks_tree.heading("file", text="Subtitle File")
+    tracks_tree.heading("folder", text="Folder")
+    tracks_tree.column("template", width=120, stretch=False)
+    tracks_tree.column("file", width=220)
+    tracks_tree.column("folder", width=220)
+    tracks_tree.grid(row=0, column=0, sticky="nsew")
+    tracks_scrollbar = ttk.Scrollbar(tracks_frame, orient="vertical", command=tracks_tree.yview)
+    tracks_scrollbar.grid(row=0, column=1, sticky="ns")
+    tracks_tree.configure(yscrollcommand=tracks_scrollbar.set)
+    tracks_tree.bind("<<TreeviewSelect>>", on_track_selected)
+    tracks_tree.bind("<Delete>", lambda event: remove_track_entries())
 
-    ttk.Label(tracks_frame, text="Track").grid(row=0, column=0, sticky="w", padx=(0, 8))
-    ttk.Label(tracks_frame, text="Template").grid(row=0, column=1, sticky="w", padx=(0, 8))
-    ttk.Label(tracks_frame, text="SRT File").grid(row=0, column=2, sticky="w", padx=(0, 8))
-    ttk.Label(tracks_frame, text="Load File").grid(row=0, column=3, sticky="w", padx=(0, 8))
-    ttk.Label(tracks_frame, text="Remove").grid(row=0, column=4, sticky="w")
+    editor_frame = ttk.Frame(tracks_section)
+    editor_frame.grid(row=1, column=0, columnspan=5, sticky="ew", pady=(8, 0))
+    editor_frame.columnconfigure(3, weight=1)
+    ttk.Label(editor_frame, text="Template").grid(row=0, column=0, sticky="w", padx=(0, 8))
+    editor_template_combo = ttk.Combobox(editor_frame, textvariable=editor_template_var, values=templates, state="readonly", width=16)
+    editor_template_combo.grid(row=0, column=1, sticky="w")
+    ttk.Label(editor_frame, text="Subtitle File").grid(row=0, column=2, sticky="w", padx=(16, 8))
+    editor_srt_entry = ttk.Entry(editor_frame, textvariable=editor_srt_var)
+    editor_srt_entry.grid(row=0, column=3, sticky="ew")
+    editor_select_button = ttk.Button(editor_frame, text="Select", command=select_srt_file)
+    editor_select_button.grid(row=0, column=4, sticky="w", padx=(8, 0))
+    editor_template_var.trace_add("write", on_editor_template_changed)
+    editor_srt_var.trace_add("write", on_editor_srt_changed)
 
     controls_frame = ttk.Frame(tracks_section)
-    controls_frame.grid(row=1, column=0, columnspan=5, sticky="ew", pady=(12, 0))
-    controls_frame.columnconfigure(2, weight=1)
+    controls_frame.grid(row=2, column=0, columnspan=5, sticky="ew", pady=(12, 0))
+    controls_frame.columnconfigure(4, weight=1)
 
-    add_button = ttk.Button(controls_frame, text="Add Track", command=add_track_entry)
-    add_button.grid(row=0, column=0, sticky="w")
-    ttk.Button(controls_frame, text="Refresh Templates", command=refresh_templates).grid(row=0, column=1, sticky="w", padx=(12, 0))
+    ttk.Button(controls_frame, text="Add Track", command=add_track_callback).grid(row=0, column=0, sticky="w")
+    # pairing needs the template names, so importing waits for the first load
+    import_folder_button = ttk.Button(controls_frame, text="Import Folder", command=import_folder)
+    import_folder_button.grid(row=0, column=1, sticky="w", padx=(12, 0))
+    import_folder_button.state(["disabled"])
+    ttk.Button(controls_frame, text="Remove", style="Delete.TButton", command=remove_track_entries).grid(row=0, column=2, sticky="w", padx=(12, 0))
+    ttk.Button(controls_frame, text="Refresh Templates", command=lambda: load_templates(refresh=True)).grid(row=0, column=3, sticky="w", padx=(12, 0))
 
     options_section = ttk.LabelFrame(content, text="Options", padding=(16, 12))
     options_section.grid(row=1, column=0, sticky="ew")
     options_section.columnconfigure(1, weight=1)
+    options_section.columnconfigure(3, weight=1)
 
-    ttk.Label(options_section, text="Case").grid(row=0, column=0, sticky="w")
+    ttk.Label(options_section, text="Case").grid(row=0, column=0, sticky="w", padx=(0, 8))
     ttk.Combobox(options_section, textvariable=text_transform_var, values=text_transform_options, state="readonly").grid(row=0, column=1, sticky="ew")
-    ttk.Label(options_section, text="Remove punctuation").grid(row=1, column=0, sticky="w", pady=(12, 0))
-    ttk.Checkbutton(options_section, variable=remove_punctuation_var, onvalue=True, offvalue=False).grid(row=1, column=1, sticky="w", pady=(12, 0))
+    ttk.Label(options_section, text="Overlapping cues").grid(row=0, column=2, sticky="w", padx=(16, 8))
+    ttk.Combobox(options_section, textvariable=overlap_policy_var, values=OVERLAP_POLICIES, state="readonly").grid(row=0, column=3, sticky="ew")
+
+    ttk.Label(options_section, text="Remove punctuation").grid(row=1, column=0, sticky="w", padx=(0, 8), pady=(12, 0))
+    punctuation_frame = ttk.Frame(options_section)
+    punctuation_frame.grid(row=1, column=1, sticky="ew", pady=(12, 0))
+    punctuation_frame.columnconfigure(1, weight=1)
+    ttk.Checkbutton(punctuation_frame, variable=remove_punctuation_var, onvalue=True, offvalue=False).grid(row=0, column=0, sticky="w")
+    ttk.Entry(punctuation_frame, textvariable=punctuation_var, width=8).grid(row=0, column=1, sticky="ew")
+    ttk.Label(options_section, text="Max chars per line").grid(row=1, column=2, sticky="w", padx=(16, 8), pady=(12, 0))
+    ttk.Spinbox(options_section, textvariable=max_chars_var, from_=0, to=200, width=6).grid(row=1, column=3, sticky="w", pady=(12, 0))
+
+    ttk.Label(options_section, text="Text rules file").grid(row=2, column=0, sticky="w", padx=(0, 8), pady=(12, 0))
+    ttk.Entry(options_section, textvariable=text_rules_var).grid(row=2, column=1, columnspan=2, sticky="ew", pady=(12, 0))
+    ttk.Button(options_section, text="Select", command=select_text_rules_file).grid(row=2, column=3, sticky="w", padx=(8, 0), pady=(12, 0))
+
+    ttk.Label(options_section, text="Profile API calls").grid(row=3, column=0, sticky="w", padx=(0, 8), pady=(12, 0))
+    ttk.Checkbutton(options_section, variable=profile_var, onvalue=True, offvalue=False, command=toggle_profiling).grid(row=3, column=1, sticky="w", pady=(12, 0))
+    ttk.Label(options_section, text="Words per caption").grid(row=3, column=2, sticky="w", padx=(16, 8), pady=(12, 0))
+    ttk.Spinbox(options_section, textvariable=words_per_group_var, from_=0, to=20, width=6).grid(row=3, column=3, sticky="w", pady=(12, 0))
+
+    ttk.Label(options_section, text="Dry run (validate only)").grid(row=4, column=0, sticky="w", padx=(0, 8), pady=(12, 0))
+    ttk.Checkbutton(options_section, variable=dry_run_var, onvalue=True, offvalue=False).grid(row=4, column=1, sticky="w", pady=(12, 0))
+
+    export_section = ttk.LabelFrame(content, text="Existing Track", padding=(16, 12))
+    export_section.grid(row=2, column=0, sticky="ew", pady=(12, 0))
+    export_section.columnconfigure(1, weight=1)
+
+    ttk.Label(export_section, text="Track").grid(row=0, column=0, sticky="w", padx=(0, 8))
+    export_track_combo = ttk.Combobox(export_section, textvariable=export_track_var, state="readonly", postcommand=refresh_export_tracks)
+    export_track_combo.grid(row=0, column=1, sticky="ew")
+    ttk.Button(export_section, text="Export SRT/VTT", command=export_callback).grid(row=0, column=2, sticky="w", padx=(12, 0))
+    ttk.Button(export_section, text="Sync from SRT", command=sync_callback).grid(row=0, column=3, sticky="w", padx=(8, 0))
 
     actions_frame = ttk.Frame(content)
-    actions_frame.grid(row=2, column=0, sticky="ew", pady=(16, 0))
-    ttk.Button(actions_frame, text="Execute", command=execute_callback).grid(row=0, column=0, sticky="ew")
+    actions_frame.grid(row=3, column=0, sticky="ew", pady=(16, 0))
+    execute_button = ttk.Button(actions_frame, text="Execute", command=execute_callback)
+    execute_button.grid(row=0, column=0, sticky="ew")
+    cancel_button = ttk.Button(actions_frame, text="Cancel", command=cancel_callback)
+    cancel_button.grid(row=0, column=1, sticky="e", padx=(12, 0))
+    cancel_button.state(["disabled"])
+    track_progress = ttk.Progressbar(actions_frame, mode="determinate")
+    track_progress.grid(row=1, column=0, columnspan=2, sticky="ew", pady=(8, 0))
+    cue_progress = ttk.Progressbar(actions_frame, mode="determinate")
+    cue_progress.grid(row=2, column=0, columnspan=2, sticky="ew", pady=(4, 0))
     actions_frame.columnconfigure(0, weight=1)
 
     status_frame = ttk.Frame(content)
-    status_frame.grid(row=3, column=0, sticky="ew", pady=(12, 0))
+    status_frame.grid(row=4, column=0, sticky="ew", pady=(12, 0))
     status_lbl = ttk.Label(status_frame, textvariable=status_var)
     status_lbl.grid(row=0, column=0, sticky="w")
 
-    add_track_entry()
-    refresh_templates()
+    template_runner = JobRunner(root, on_progress=lambda payload: None, on_done=on_templates_loaded)
+
+    tracks_tree.selection_set(add_track_entry())
+    root.after_idle(load_templates)
 
     root.mainloop()
 
+if os.environ.get("OPENCAPTIONS_PROFILE"):
+    enable_profiling()
+
 if __name__ == "__main__":
+    argv = getattr(sys, "argv", [])[1:]
+    if argv:
+        sys.exit(cli(argv))
     main()
\ No newline at end of file
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Benchmark the OpenCaptions caption pipeline against the fake Resolve API
+
+Generates synthetic SRT files, runs every stage of the pipeline on a fresh
+FakeResolve and reports the wall time and API call count of each stage.
+
+    python benchmarks/bench_pipeline.py --sizes 100 1000 10000 --latency 0.0005
+
+With --baseline (a file written earlier with --json) it exits non-zero when
+a stage makes more API calls, or takes longer when --time-tolerance is set,
+than the baseline allows, so it can gate CI.
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import OpenCaptions
+from fake_resolve import FakeResolve
+
+TEMPLATE_NAME = "Default"
+
+# wall time differences below this are noise, never a regression
+MIN_TIME_REGRESSION = 0.01
+
+# cues changed by the sync stage: a third retimed, a third retexted, a third removed
+SYNC_EDITS = 9
+
+
+def write_synthetic_srt(file_path, cue_count):
+    """Write cue_count two-line cues, 1.5s long with a 0.5s gap"""
+    with open(file_path, 'w', encoding='utf-8') as file:
+        for index in range(1, cue_count + 1):
+            start_ms = index * 2000
+            file.write(f"{index}\n")
+            file.write(f"{OpenCaptions.format_timestamp(start_ms)} --> {OpenCaptions.format_timestamp(start_ms + 1500)}\n")
+            file.write(f"Subtitle number {index}, first line.\nAnd a second line.\n\n")
+
+
+def edit_cues(cues, edit_count):
+    """Return a copy of cues with edit_count cues spread over the file retimed, retexted or removed"""
+    edited = OpenCaptions.CueStore()
+    step = max(len(cues) // max(edit_count, 1), 1)
+    for index in range(len(cues)):
+        start_ms, end_ms, text = cues.start_ms[index], cues.end_ms[index], cues.texts[index]
+        if index % step == 0 and index // step < edit_count:
+            edit = index // step % 3
+            if edit == 0:
+                start_ms += 100
+            elif edit == 1:
+                text = "Corrected " + text
+            else:
+                continue
+        edited.append(cues.ids[index], start_ms, end_ms, text)
+    return edited
+
+
+def reset_caches(cache_dir):
+    OpenCaptions.template_registry = OpenCaptions.TemplateRegistry()
+    OpenCaptions._timeline_snapshots.clear()
+    OpenCaptions._duration_multipliers = None
+    OpenCaptions.DURATION_MULTIPLIER_CACHE_PATH = os.path.join(cache_dir, "duration_multipliers.json")
+
+
+def silence_pipeline_logging():
+    """Drop the pipeline's log records so only the report reaches the output"""
+    for handler in list(OpenCaptions.logger.handlers):
+        OpenCaptions.logger.removeHandler(handler)
+    OpenCaptions.logger.addHandler(logging.NullHandler())
+    OpenCaptions.logger.setLevel(logging.WARNING)
+    OpenCaptions.logger.propagate = False
+
+
+def run_stage(fake, stage_name, results, function, *args, **kwargs):
+    fake.stats.reset()
+    started = time.perf_counter()
+    value = function(*args, **kwargs)
+    results[stage_name] = {"seconds": time.perf_counter() - started, "api_calls": fake.stats.total()}
+    return value
+
+
+def bench_size(cue_count, work_dir, latency, clip_latency, media_clips):
+    srt_path = os.path.join(work_dir, f"synthetic_{cue_count}.srt")
+    write_synthetic_srt(srt_path, cue_count)
+
+    fake = FakeResolve(latency=latency, clip_latency=clip_latency, templates=(TEMPLATE_NAME,), media_clips=media_clips)
+    OpenCaptions.resolve = fake
+    reset_caches(work_dir)
+    timeline = fake.project.current_timeline
+    results = {}
+
+    cues = run_stage(fake, "parse", results, OpenCaptions.read_subtitles, srt_path)
+    run_stage(fake, "insert", results, OpenCaptions.df2NewtimelineText, cues, timeline, TEMPLATE_NAME)
+    track_name = timeline.track_names[-1]
+    created = len(timeline.tracks[-1])
+    read_back = run_stage(fake, "read", results, OpenCaptions.timelineText2df, timeline, track_name)
+    run_stage(fake, "write_back", results, OpenCaptions.df2timelineText, read_back, timeline, track_name)
+    run_stage(fake, "export", results, OpenCaptions.export_track_to_subtitles, timeline, track_name, os.path.join(work_dir, f"export_{cue_count}.srt"))
+
+    edited = edit_cues(cues, SYNC_EDITS)
+    run_stage(fake, "sync", results, OpenCaptions.sync_track_from_cues, timeline, track_name, edited)
+
+    if created != len(cues):
+        results["error"] = f"created {created} clips for {len(cues)} cues"
+    return results
+
+
+def find_regressions(all_results, baseline, call_tolerance, time_tolerance=None):
+    """
+    Compare results with a baseline loaded from a --json file
+
+    API call counts are deterministic and always compared; a stage regresses
+    when it makes more than (1 + call_tolerance) times the baseline's calls.
+    Wall time is only compared when time_tolerance is given. Sizes or stages
+    missing from the baseline are skipped. Returns a list of messages.
+    """
+    regressions = []
+    for cue_count, results in all_results.items():
+        baseline_results = baseline.get(str(cue_count), {})
+        for stage_name, result in results.items():
+            reference = baseline_results.get(stage_name)
+            if stage_name == "error" or not isinstance(reference, dict):
+                continue
+            if result["api_calls"] > reference["api_calls"] * (1 + call_tolerance):
+                regressions.append(f"{cue_count} {stage_name}: {result['api_calls']} API calls, baseline {reference['api_calls']}")
+            if time_tolerance is not None and result["seconds"] - reference["seconds"] > max(reference["seconds"] * time_tolerance, MIN_TIME_REGRESSION):
+                regressions.append(f"{cue_count} {stage_name}: {result['seconds']:.3f}s, baseline {reference['seconds']:.3f}s")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000], help="cue counts to benchmark")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds slept per fake API call")
+    parser.add_argument("--clip-latency", type=float, default=0.0, help="extra seconds per clip sent to AppendToTimeline")
+    parser.add_argument("--media-clips", type=int, default=1000, help="regular media clips in the fake Media Pool")
+    parser.add_argument("--json", help="also write the results to this JSON file")
+    parser.add_argument("--baseline", help="fail when a stage regresses against this --json results file")
+    parser.add_argument("--call-tolerance", type=float, default=0.05, help="allowed relative increase of API calls over the baseline (default 0.05)")
+    parser.add_argument("--time-tolerance", type=float, help="allowed relative increase of wall time over the baseline (not checked by default)")
+    args = parser.parse_args(argv)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as file:
+            baseline = json.load(file)
+
+    silence_pipeline_logging()
+    all_results = {}
+    with tempfile.TemporaryDirectory() as work_dir:
+        for cue_count in args.sizes:
+            all_results[cue_count] = bench_size(cue_count, work_dir, args.latency, args.clip_latency, args.media_clips)
+
+    print(f"{'cues':>7}  {'stage':<11} {'seconds':>9} {'api calls':>10}")
+    for cue_count, results in all_results.items():
+        for stage_name, result in results.items():
+            if stage_name == "error":
+                print(f"{cue_count:>7}  ERROR: {result}")
+                continue
+            print(f"{cue_count:>7}  {stage_name:<11} {result['seconds']:>9.3f} {result['api_calls']:>10}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as file:
+            json.dump(all_results, file, indent=2)
+
+    failed = any("error" in results for results in all_results.values())
+    if baseline is not None:
+        regressions = find_regressions(all_results, baseline, args.call_tolerance, args.time_tolerance)
+        for regression in regressions:
+            print(f"REGRESSION: {regression}")
+        failed = failed or bool(regressions)
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
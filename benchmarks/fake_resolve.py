@@ -0,0 +1,343 @@
+"""
+In-process stand-in for the subset of the DaVinci Resolve scripting API used by OpenCaptions
+
+Every API method goes through FakeResolve.call(), which counts the call and
+sleeps for the configured latency, so the benchmarks can measure both wall
+time and round trips without a running Resolve.
+"""
+
+import bisect
+import itertools
+import time
+from collections import Counter
+
+
+class ApiStats:
+    """Per-method call counter shared by every object of a FakeResolve"""
+
+    def __init__(self):
+        self.calls = Counter()
+
+    def total(self):
+        return sum(self.calls.values())
+
+    def reset(self):
+        self.calls.clear()
+
+
+class FakeObject:
+    def __init__(self, api):
+        self._api = api
+        self._uid = str(next(api.ids))
+
+    def GetUniqueId(self):
+        self._api.call("GetUniqueId")
+        return self._uid
+
+
+class FakeTextPlusTool(FakeObject):
+    def __init__(self, api):
+        super().__init__(api)
+        self.inputs = {"StyledText": "Custom Text"}
+
+    def GetInput(self, name):
+        self._api.call("GetInput")
+        return self.inputs.get(name)
+
+    def SetInput(self, name, value):
+        self._api.call("SetInput")
+        self.inputs[name] = value
+        return True
+
+
+class FakeFusionComp(FakeObject):
+    def __init__(self, api):
+        super().__init__(api)
+        self.text_tool = FakeTextPlusTool(api)
+
+    def FindToolByID(self, tool_id):
+        self._api.call("FindToolByID")
+        return self.text_tool if tool_id == "TextPlus" else None
+
+
+class FakeMediaPoolItem(FakeObject):
+    def __init__(self, api, name, file_path="", fps="24", duration="00:00:05:00"):
+        super().__init__(api)
+        self.properties = {"Clip Name": name, "File Path": file_path, "FPS": fps, "Duration": duration}
+
+    def GetName(self):
+        self._api.call("GetName")
+        return self.properties["Clip Name"]
+
+    def GetClipProperty(self, name=None):
+        self._api.call("GetClipProperty")
+        if name is None:
+            return dict(self.properties)
+        return self.properties.get(name, "")
+
+    @property
+    def is_template(self):
+        return self.properties["File Path"] == ""
+
+
+class FakeTimelineItem(FakeObject):
+    def __init__(self, api, media_pool_item, track_index, start, duration):
+        super().__init__(api)
+        self.media_pool_item = media_pool_item
+        self.track_index = track_index
+        self.start = start
+        self.duration = duration
+        self.clip_color = ""
+        self.comp = FakeFusionComp(api) if media_pool_item.is_template else None
+
+    @property
+    def end(self):
+        return self.start + self.duration
+
+    def GetName(self):
+        self._api.call("GetName")
+        return "Text+" if self.comp else self.media_pool_item.properties["Clip Name"]
+
+    def GetStart(self):
+        self._api.call("GetStart")
+        return self.start
+
+    def GetEnd(self):
+        self._api.call("GetEnd")
+        return self.end
+
+    def GetDuration(self):
+        self._api.call("GetDuration")
+        return self.duration
+
+    def GetTrackTypeAndIndex(self):
+        self._api.call("GetTrackTypeAndIndex")
+        return ["video", self.track_index]
+
+    def SetClipColor(self, color):
+        self._api.call("SetClipColor")
+        self.clip_color = color
+        return True
+
+    def GetFusionCompCount(self):
+        self._api.call("GetFusionCompCount")
+        return 1 if self.comp else 0
+
+    def GetFusionCompByIndex(self, index):
+        self._api.call("GetFusionCompByIndex")
+        return self.comp if index == 1 else None
+
+    def GetMediaPoolItem(self):
+        self._api.call("GetMediaPoolItem")
+        return self.media_pool_item
+
+
+class FakeTimeline(FakeObject):
+    def __init__(self, api, name, frame_rate):
+        super().__init__(api)
+        self.name = name
+        self.frame_rate = frame_rate
+        self.tracks = [[]]
+        self.track_names = ["Video 1"]
+
+    def GetName(self):
+        self._api.call("GetName")
+        return self.name
+
+    def GetSetting(self, name=None):
+        self._api.call("GetSetting")
+        return self.frame_rate if name == "timelineFrameRate" else ""
+
+    def GetTrackCount(self, track_type):
+        self._api.call("GetTrackCount")
+        return len(self.tracks) if track_type == "video" else 0
+
+    def AddTrack(self, track_type, *args):
+        self._api.call("AddTrack")
+        self.tracks.append([])
+        self.track_names.append(f"Video {len(self.tracks)}")
+        return True
+
+    def DeleteTrack(self, track_type, track_index):
+        self._api.call("DeleteTrack")
+        if not 1 <= track_index <= len(self.tracks):
+            return False
+        del self.tracks[track_index - 1]
+        del self.track_names[track_index - 1]
+        for index, track in enumerate(self.tracks[track_index - 1:], start=track_index):
+            for item in track:
+                item.track_index = index
+        return True
+
+    def GetTrackName(self, track_type, track_index):
+        self._api.call("GetTrackName")
+        return self.track_names[track_index - 1]
+
+    def SetTrackName(self, track_type, track_index, name):
+        self._api.call("SetTrackName")
+        self.track_names[track_index - 1] = name
+        return True
+
+    def GetItemListInTrack(self, track_type, track_index):
+        self._api.call("GetItemListInTrack")
+        return list(self.tracks[track_index - 1])
+
+    def DeleteClips(self, items, ripple=False):
+        self._api.call("DeleteClips")
+        doomed = {id(item) for item in items}
+        for track in self.tracks:
+            track[:] = [item for item in track if id(item) not in doomed]
+        return True
+
+    def place(self, track_index, media_pool_item, record_frame, duration):
+        """
+        Place a clip like Resolve does, refusing clips that overlap an existing one
+        Tracks are kept sorted by start frame.
+        """
+        track = self.tracks[track_index - 1]
+        end = record_frame + duration
+        position = bisect.bisect_left(track, record_frame, key=lambda item: item.start)
+        if duration <= 0:
+            return None
+        if position > 0 and track[position - 1].end > record_frame:
+            return None
+        if position < len(track) and track[position].start < end:
+            return None
+        item = FakeTimelineItem(self._api, media_pool_item, track_index, record_frame, duration)
+        track.insert(position, item)
+        return item
+
+
+class FakeFolder(FakeObject):
+    def __init__(self, api, name, clips=(), subfolders=()):
+        super().__init__(api)
+        self.name = name
+        self.clips = list(clips)
+        self.subfolders = list(subfolders)
+
+    def GetName(self):
+        self._api.call("GetName")
+        return self.name
+
+    def GetClipList(self):
+        self._api.call("GetClipList")
+        return list(self.clips)
+
+    def GetSubFolderList(self):
+        self._api.call("GetSubFolderList")
+        return list(self.subfolders)
+
+
+class FakeMediaPool(FakeObject):
+    def __init__(self, api, project, root_folder):
+        super().__init__(api)
+        self.project = project
+        self.root_folder = root_folder
+
+    def GetRootFolder(self):
+        self._api.call("GetRootFolder")
+        return self.root_folder
+
+    def AppendToTimeline(self, clip_infos):
+        self._api.call("AppendToTimeline", len(clip_infos))
+        timeline = self.project.current_timeline
+        items = []
+        for clip_info in clip_infos:
+            duration = clip_info["endFrame"] - clip_info["startFrame"] + 1
+            item = timeline.place(clip_info["trackIndex"], clip_info["mediaPoolItem"], clip_info["recordFrame"], duration)
+            if item is not None:
+                items.append(item)
+        return items
+
+
+class FakeProject(FakeObject):
+    def __init__(self, api, name, frame_rate, templates, media_clips):
+        super().__init__(api)
+        self.name = name
+        self.timelines = [FakeTimeline(api, "Timeline 1", frame_rate)]
+        self.current_timeline = self.timelines[0]
+        template_items = [FakeMediaPoolItem(api, template) for template in templates]
+        media_items = [FakeMediaPoolItem(api, f"clip_{index:05d}.mov", f"/media/clip_{index:05d}.mov") for index in range(media_clips)]
+        root_folder = FakeFolder(api, "Master", media_items, [FakeFolder(api, "Captions Templates", template_items)])
+        self.media_pool = FakeMediaPool(api, self, root_folder)
+
+    def GetName(self):
+        self._api.call("GetName")
+        return self.name
+
+    def GetMediaPool(self):
+        self._api.call("GetMediaPool")
+        return self.media_pool
+
+    def GetCurrentTimeline(self):
+        self._api.call("GetCurrentTimeline")
+        return self.current_timeline
+
+    def SetCurrentTimeline(self, timeline):
+        self._api.call("SetCurrentTimeline")
+        self.current_timeline = timeline
+        return True
+
+    def GetTimelineCount(self):
+        self._api.call("GetTimelineCount")
+        return len(self.timelines)
+
+    def GetTimelineByIndex(self, index):
+        self._api.call("GetTimelineByIndex")
+        return self.timelines[index - 1]
+
+
+class FakeProjectManager(FakeObject):
+    def __init__(self, api, project):
+        super().__init__(api)
+        self.projects = {project.name: project}
+        self.current_project = project
+
+    def GetCurrentProject(self):
+        self._api.call("GetCurrentProject")
+        return self.current_project
+
+    def LoadProject(self, name):
+        self._api.call("LoadProject")
+        project = self.projects.get(name)
+        if project:
+            self.current_project = project
+        return project
+
+    def SaveProject(self):
+        self._api.call("SaveProject")
+        return True
+
+
+class FakeResolve(FakeObject):
+    """
+    Fake Resolve scripting object
+
+    Args:
+        latency: Seconds slept on every API call
+        latencies: Optional per-method latency overrides, e.g. {"AppendToTimeline": 0.05}
+        clip_latency: Extra seconds per clip sent to AppendToTimeline
+        frame_rate: Value returned for the timelineFrameRate setting
+        templates: Names of the Text+ templates in the "Captions Templates" folder
+        media_clips: Number of regular media clips in the root folder
+    """
+
+    def __init__(self, latency=0.0, latencies=None, clip_latency=0.0, frame_rate="24", templates=("Default",), media_clips=0):
+        self.stats = ApiStats()
+        self.ids = itertools.count(1)
+        self.latency = latency
+        self.latencies = dict(latencies or {})
+        self.clip_latency = clip_latency
+        super().__init__(self)
+        self.project = FakeProject(self, "Project", frame_rate, templates, media_clips)
+        self.project_manager = FakeProjectManager(self, self.project)
+
+    def call(self, method, clips=0):
+        self.stats.calls[method] += 1
+        delay = self.latencies.get(method, self.latency) + clips * self.clip_latency
+        if delay:
+            time.sleep(delay)
+
+    def GetProjectManager(self):
+        self.call("GetProjectManager")
+        return self.project_manager